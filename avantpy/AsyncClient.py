@@ -0,0 +1,142 @@
+from . import utils
+import logging
+import gzip
+from typing import Optional, Any, Tuple
+
+
+class AsyncClient:
+    """Async Client
+
+    A class to share one aiohttp session with AvantData between asyncio tasks
+
+    The session is opened on the first request, inside the running event loop. aiohttp must be installed.
+
+    Args:
+        url (str, optional): AvantData URL
+        cluster (str, optional): Header parameter for communication with the api
+        verify_SSL (bool, optional): Bool to verify SSL of requests
+        limit (int, optional): Number of simultaneous connections
+        headers (dict, optional): Headers to be sent in every request to the api
+        compress (bool, optional): Gzip the request bodies and ask for gzipped responses
+
+    Attributes:
+        url (str): AvantData URL
+        cluster (str): Header parameter for communication with the api
+        verify_SSL (bool): Bool to verify SSL of requests
+        limit (int): Number of simultaneous connections
+        headers (dict): Headers to be sent in every request to the api
+        compress (bool): Gzip the request bodies and ask for gzipped responses
+        sent (list(int)): Bytes of the request bodies before and after compression
+        received (list(int)): Bytes of the response bodies after and before decompression
+        session (ClientSession): aiohttp session holding the connection pool
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> import asyncio
+        >>> import avantpy
+        >>> async def main():
+        ...     async with avantpy.AsyncClient('https://192.168.102.133') as client:
+        ...         searches = [avantpy.download.AsyncSearch(client=client, index=index) for index in ('iana', 'kev')]
+        ...         await asyncio.gather(*(s.search() for s in searches))
+        ...         return [len(s.data) for s in searches]
+        >>> asyncio.run(main())
+        [56039, 868]
+    """
+
+    def __init__(self,
+                 url: Optional[str] = '',
+                 cluster: Optional[str] = 'AvantData',
+                 verify_SSL: Optional[bool] = False,
+                 limit: Optional[int] = 100,
+                 headers: Optional[dict] = {},
+                 compress: Optional[bool] = False):
+        self.log = logging.getLogger(__name__)
+        self.url = utils.get_url(url)
+        self.cluster = cluster
+        self.verify_SSL = verify_SSL
+        self.limit = limit
+        self.headers = headers
+        self.compress = compress
+        self.sent = [0, 0]
+        self.received = [0, 0]
+        self.session = None
+
+    def __repr__(self):
+        return '<AsyncClient for {} with {} connections>'.format(self.url, self.limit)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def open(self) -> Any:
+        """Opens the aiohttp session if it is not open yet and returns it"""
+        if self.session is None or self.session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             ssl=None if self.verify_SSL else False)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def request(self, method: str, api: str, **kwargs: Any) -> Tuple[int, bytes]:
+        """Sends a request to the api reusing the pooled connections.
+
+        If `compress`, the body is gzipped with a Content-Encoding header and the response is asked gzipped, and
+        their sizes are counted in `sent` and `received`.
+
+        Args:
+            method: HTTP method of the request
+            api: Endpoint to be joined to the url, or an absolute URL
+            kwargs: Arguments passed to `aiohttp.ClientSession.request`
+
+        Returns:
+            The status code and the body of the response
+        """
+        session = await self.open()
+        url = api if api.startswith(('http://', 'https://')) else self.url+api
+        headers = {'cluster': self.cluster, **self.headers}
+        headers.update(kwargs.pop('headers', None) or {})
+        if not self.compress:
+            async with session.request(method, url, headers=headers, **kwargs) as response:
+                return response.status, await response.read()
+        headers.setdefault('Accept-Encoding', 'gzip')
+        data = kwargs.get('data')
+        if isinstance(data, (str, bytes)) and data:
+            data = data.encode() if isinstance(data, str) else data
+            kwargs['data'] = gzip.compress(data, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+            self.count(self.sent, len(data), len(kwargs['data']))
+        async with session.request(method, url, headers=headers, **kwargs) as response:
+            content = await response.read()
+            self.count(self.received, len(content), int(response.headers.get('Content-Length', len(content))))
+            return response.status, content
+
+    def count(self, counter: list, size: int, compressed: int):
+        """Adds the size of a body before and after compression to a counter"""
+        counter[0] += size
+        counter[1] += compressed
+
+    def compression(self) -> str:
+        """Returns the compression ratio of the request and response bodies. See `Client.compression`"""
+        return 'Compression: sent {} of {} bytes ({:.1f}x), received {} of {} bytes ({:.1f}x)'.format(
+            self.sent[1], self.sent[0], self.sent[0] / (self.sent[1] or 1),
+            self.received[1], self.received[0], self.received[0] / (self.received[1] or 1))
+
+    async def get(self, api: str, **kwargs: Any) -> Tuple[int, bytes]:
+        """Sends a GET request to the api. See `request`"""
+        return await self.request('GET', api, **kwargs)
+
+    async def post(self, api: str, **kwargs: Any) -> Tuple[int, bytes]:
+        """Sends a POST request to the api. See `request`"""
+        return await self.request('POST', api, **kwargs)
+
+    async def put(self, api: str, **kwargs: Any) -> Tuple[int, bytes]:
+        """Sends a PUT request to the api. See `request`"""
+        return await self.request('PUT', api, **kwargs)
+
+    async def close(self):
+        """Closes the aiohttp session"""
+        if self.session is not None:
+            await self.session.close()
@@ -0,0 +1,133 @@
+from urllib3.exceptions import InsecureRequestWarning
+from requests.adapters import HTTPAdapter
+from . import utils
+import threading
+import requests
+import logging
+import gzip
+from typing import Optional, Any
+
+
+class Client:
+    """Client
+
+    A class to share one pooled HTTP session with AvantData between downloads and uploads
+
+    Args:
+        url (str, optional): AvantData URL
+        cluster (str, optional): Header parameter for communication with the api
+        verify_SSL (bool, optional): Bool to verify SSL of requests
+        pool_maxsize (int, optional): Number of connections kept alive for each host
+        headers (dict, optional): Headers to be sent in every request to the api
+        compress (bool, optional): Gzip the request bodies and ask for gzipped responses
+
+    Attributes:
+        url (str): AvantData URL
+        cluster (str): Header parameter for communication with the api
+        verify_SSL (bool): Bool to verify SSL of requests
+        pool_maxsize (int): Number of connections kept alive for each host
+        headers (dict): Headers to be sent in every request to the api
+        compress (bool): Gzip the request bodies and ask for gzipped responses
+        sent (list(int)): Bytes of the request bodies before and after compression
+        received (list(int)): Bytes of the response bodies after and before decompression
+        session (Session): Session holding the connection pool
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> import avantpy
+        >>> client = avantpy.Client('https://192.168.102.133', pool_maxsize=8)
+        >>> s = avantpy.download.Search(client=client, index='avantscan_results')
+        >>> avantpy.upload.UpsertBulk(s.data, client=client, threads=8).upload()
+    """
+
+    def __init__(self,
+                 url: Optional[str] = '',
+                 cluster: Optional[str] = 'AvantData',
+                 verify_SSL: Optional[bool] = False,
+                 pool_maxsize: Optional[int] = 10,
+                 headers: Optional[dict] = {},
+                 compress: Optional[bool] = False):
+        self.log = logging.getLogger(__name__)
+        self.url = utils.get_url(url)
+        self.cluster = cluster
+        self.verify_SSL = verify_SSL
+        self.pool_maxsize = pool_maxsize
+        self.headers = headers
+        self.compress = compress
+        self.sent = [0, 0]
+        self.received = [0, 0]
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize,
+                              pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        requests.packages.urllib3.disable_warnings(
+            category=InsecureRequestWarning)
+
+    def __repr__(self):
+        return '<Client for {} with {} pooled connections>'.format(self.url, self.pool_maxsize)
+
+    def request(self, method: str, api: str, **kwargs: Any) -> requests.Response:
+        """Sends a request to the api reusing the pooled connections.
+
+        If `compress`, the body is gzipped with a Content-Encoding header and the response is asked gzipped, and
+        their sizes are counted in `sent` and `received`.
+
+        Args:
+            method: HTTP method of the request
+            api: Endpoint to be joined to the url, or an absolute URL
+            kwargs: Arguments passed to `requests.Session.request`
+
+        Returns:
+            The response of the request
+        """
+        url = api if api.startswith(('http://', 'https://')) else self.url+api
+        headers = {'cluster': self.cluster, **self.headers}
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('verify', self.verify_SSL)
+        if not self.compress:
+            return self.session.request(method, url, headers=headers, **kwargs)
+        headers.setdefault('Accept-Encoding', 'gzip')
+        data = kwargs.get('data')
+        if isinstance(data, (str, bytes)) and data:
+            data = data.encode() if isinstance(data, str) else data
+            kwargs['data'] = gzip.compress(data, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+            self.count(self.sent, len(data), len(kwargs['data']))
+        response = self.session.request(method, url, headers=headers, **kwargs)
+        content = response.content
+        try:
+            transferred = response.raw.tell() or len(content)
+        except AttributeError:
+            transferred = int(response.headers.get('Content-Length', len(content)))
+        self.count(self.received, len(content), transferred)
+        return response
+
+    def count(self, counter: list, size: int, compressed: int):
+        """Adds the size of a body before and after compression to a counter"""
+        with self.lock:
+            counter[0] += size
+            counter[1] += compressed
+
+    def compression(self) -> str:
+        """Returns the compression ratio of the request and response bodies"""
+        return 'Compression: sent {} of {} bytes ({:.1f}x), received {} of {} bytes ({:.1f}x)'.format(
+            self.sent[1], self.sent[0], self.sent[0] / (self.sent[1] or 1),
+            self.received[1], self.received[0], self.received[0] / (self.received[1] or 1))
+
+    def get(self, api: str, **kwargs: Any) -> requests.Response:
+        """Sends a GET request to the api. See `request`"""
+        return self.request('GET', api, **kwargs)
+
+    def post(self, api: str, **kwargs: Any) -> requests.Response:
+        """Sends a POST request to the api. See `request`"""
+        return self.request('POST', api, **kwargs)
+
+    def put(self, api: str, **kwargs: Any) -> requests.Response:
+        """Sends a PUT request to the api. See `request`"""
+        return self.request('PUT', api, **kwargs)
+
+    def close(self):
+        """Closes all pooled connections"""
+        self.session.close()
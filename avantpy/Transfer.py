@@ -1,6 +1,7 @@
 from . import download
 from . import utils
 from . import upload
+from .Client import Client
 from typing import Any
 
 
@@ -18,6 +19,7 @@ class Transfer():
         index (str): index to be passed to UpsertBulk (will be the same as `name` if None)
         data (list(dict)): List of dictionaries to be indexed [{"key1":..., "key2":..., "key3":..., ...},...]
         json (dict): json to be downloaded in case data is not passed
+        client (Client): Client shared by the download, Template and UpsertBulk requests
 
     Examples:
         >>> from avantpy import Transfer
@@ -31,6 +33,10 @@ class Transfer():
         INFO:avantpy.upload.UpsertBulk:2 successfully executed with 0 failures
         INFO:avantpy.upload.UpsertBulk:Created: 2 / Updated: 0 / Failed: 0
         Transfer executed with 2 documents
+
+        Documents unchanged since the last transfer are not sent again with a `HashIndex`:
+
+        >>> Transfer(data=data, name='data_transfer_test', baseurl='https://avantshow.avantdata.com.br', hash_index=avantpy.upload.HashIndex())
     """
 
     def __init__(self, **kwargs: Any):
@@ -39,7 +45,12 @@ class Transfer():
         self.index = kwargs.get('index', self.name)
         self.json = kwargs.get('json')
         self.data = kwargs.get('data', list())
-        self.transfer(**kwargs)
+        self.client = kwargs.pop('client', None) or Client(kwargs.get('baseurl', ''),
+                                                           cluster=kwargs.get('cluster', 'AvantData'),
+                                                           verify_SSL=kwargs.get('verify_SSL', False),
+                                                           pool_maxsize=max(10, kwargs.get('threads', 1)),
+                                                           compress=kwargs.get('compress', False))
+        self.transfer(client=self.client, **kwargs)
 
     def __repr__(self):
         return 'Transfer executed with {} documents'.format(len(self.data))
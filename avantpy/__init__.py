@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 from . import utils
+from . import codec
 from . import download
 from . import upload
+from .Client import *
+from .AsyncClient import *
 from .Transfer import *
 
 import logging
@@ -0,0 +1,222 @@
+from collections.abc import Mapping
+import json
+import logging
+from typing import Any, List, Optional, Tuple, Union
+
+log = logging.getLogger(__name__)
+
+backends = ('orjson', 'ujson', 'json')
+formats = ('json', 'msgpack')
+compressions = (None, 'zlib', 'gzip')
+marker = 'avantpy'
+version = 1
+backend = None
+_loads = None
+_dumps = None
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Selects the JSON library used to parse responses and serialize request bodies
+
+    Args:
+        name: 'orjson', 'ujson' or 'json'. If None, the fastest installed library is used
+
+    Returns:
+        The name of the selected library
+
+    Raises:
+        ValueError: If the name is not a supported library
+        ImportError: If the requested library is not installed
+    """
+    global backend, _loads, _dumps
+    if name is not None and name not in backends:
+        raise ValueError('JSON backend must be one of {}'.format(backends))
+    for candidate in ([name] if name else backends):
+        try:
+            if candidate == 'orjson':
+                import orjson
+                _loads = orjson.loads
+                _dumps = lambda obj: orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+            elif candidate == 'ujson':
+                import ujson
+                _loads = ujson.loads
+                _dumps = lambda obj: ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+            else:
+                _loads = json.loads
+                _dumps = lambda obj: json.dumps(obj, default=default).encode('utf-8')
+        except ImportError:
+            if name:
+                raise
+            continue
+        backend = candidate
+        break
+    log.debug('Using {} as JSON backend'.format(backend))
+    return backend
+
+
+def default(obj: Any) -> Any:
+    """Converts objects the JSON libraries do not know, such as `download.Hit` views, to serializable types
+
+    Args:
+        obj: Object to be converted
+
+    Returns:
+        A dictionary for mappings
+
+    Raises:
+        TypeError: If the object can not be converted
+    """
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(obj).__name__))
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parses a JSON document
+
+    Args:
+        data: JSON document, usually the `content` of a response
+
+    Returns:
+        The parsed object
+    """
+    return _loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes an object to a UTF-8 encoded JSON document, ready to be sent as a request body
+
+    Objects the selected library can not serialize (such as integers over 64 bits for orjson)
+    are serialized with the standard json library.
+
+    Args:
+        obj: Object to be serialized
+
+    Returns:
+        The JSON document as bytes
+    """
+    try:
+        return _dumps(obj)
+    except (TypeError, OverflowError):
+        return json.dumps(obj, default=default).encode('utf-8')
+
+
+def pack(value: Any, format: Optional[str] = 'json', compress: Optional[str] = None) -> str:
+    """Serializes a value to the string stored in AvantData memory
+
+    The string starts with a marker, the version of the format, the serialization and the
+    compression, such as 'avantpy:1:json:zlib:', followed by the serialized value. Compressed
+    and msgpack values are base64 encoded.
+
+    Args:
+        value: Object to be stored
+        format: 'json' or 'msgpack', which requires msgpack to be installed
+        compress: None, 'zlib' or 'gzip'
+
+    Returns:
+        The string to be stored
+
+    Raises:
+        ValueError: If the format or the compression is not supported
+
+    Examples:
+        >>> codec.pack([1, 2])
+        'avantpy:1:json:none:[1,2]'
+        >>> codec.unpack(codec.pack([1, 2], compress='zlib'))
+        [1, 2]
+    """
+    if format not in formats:
+        raise ValueError('Memory format must be one of {}'.format(formats))
+    if compress not in compressions:
+        raise ValueError('Memory compression must be one of {}'.format(compressions))
+    if format == 'msgpack':
+        import msgpack
+        data = msgpack.packb(value, default=default, use_bin_type=True)
+    else:
+        data = dumps(value)
+    if compress == 'zlib':
+        import zlib
+        data = zlib.compress(data)
+    elif compress == 'gzip':
+        import gzip
+        data = gzip.compress(data)
+    if format == 'json' and compress is None:
+        body = data.decode('utf-8')
+    else:
+        import base64
+        body = base64.b64encode(data).decode('ascii')
+    return '{}:{}:{}:{}:{}'.format(marker, version, format, compress or 'none', body)
+
+
+def unpack(text: str) -> Any:
+    """Parses a string stored in AvantData memory by `pack`
+
+    Strings without the marker are Python literals stored by older versions, parsed without
+    evaluating any code.
+
+    Args:
+        text: Stored string
+
+    Returns:
+        The stored object
+
+    Raises:
+        ValueError: If the string was stored by a newer version or is not valid
+    """
+    if not text.startswith(marker + ':'):
+        import ast
+        return ast.literal_eval(text)
+    _, textVersion, format, compress, body = text.split(':', 4)
+    if int(textVersion) > version or format not in formats:
+        raise ValueError('Unsupported memory format {}:{}'.format(textVersion, format))
+    if format == 'json' and compress == 'none':
+        return loads(body)
+    import base64
+    data = base64.b64decode(body)
+    if compress == 'zlib':
+        import zlib
+        data = zlib.decompress(data)
+    elif compress == 'gzip':
+        import gzip
+        data = gzip.decompress(data)
+    if format == 'msgpack':
+        import msgpack
+        return msgpack.unpackb(data, raw=False)
+    return loads(data)
+
+
+def split(key: str, text: str, size: int) -> List[Tuple[str, str]]:
+    """Splits a string to be stored in memory into chunks of at most size characters
+
+    Strings larger than size are stored in the keys 'key#0', 'key#1' and so on, and key stores
+    a manifest with the number of chunks, such as 'avantpy:1:chunks:3:'.
+
+    Args:
+        key: Key of the value
+        text: String returned by `pack`
+        size: Maximum length of the string stored in each key
+
+    Returns:
+        The key and string of each chunk, with key and the manifest last
+    """
+    if len(text) <= size:
+        return [(key, text)]
+    parts = [text[i:i+size] for i in range(0, len(text), size)]
+    return list(zip(chunk_keys(key, len(parts)), parts)) + [
+        (key, '{}:{}:chunks:{}:'.format(marker, version, len(parts)))]
+
+
+def chunks(text: str) -> int:
+    """Returns the number of chunks of a manifest stored by `split`, or 0 if text is not a manifest"""
+    prefix = '{}:{}:chunks:'.format(marker, version)
+    if isinstance(text, str) and text.startswith(prefix):
+        return int(text[len(prefix):].split(':', 1)[0])
+    return 0
+
+
+def chunk_keys(key: str, count: int) -> List[str]:
+    """Returns the keys of the chunks of a value split by `split`"""
+    return ['{}#{}'.format(key, i) for i in range(count)]
+
+
+set_backend()
@@ -0,0 +1,291 @@
+from ..AsyncClient import AsyncClient
+from .. import codec
+from .. import utils
+from .Search import Search
+from .Columns import Columns
+import requests
+import asyncio
+import logging
+from typing import Optional, Any, List, Dict, AsyncIterator, Generator
+
+
+class AsyncSearch(Search):
+    """Async Search
+
+    A class to manage downloads from avantdata inside an asyncio event loop
+
+    Accepts the same arguments as `Search`, reusing its query building, pagers and formatting: only the
+    requests are awaited, see `drive`. Nothing is downloaded on instantiation: await `search` or iterate
+    `iter_pages` and `iter_docs`. The `windows` and `cache` arguments are not supported and raise ValueError,
+    as do `export`, `windowRanges` and `windowPages`: write the pages of `iter_pages` instead of exporting.
+
+    Args:
+        url (str, optional): AvantData URL
+        client (AsyncClient, optional): Shared async client whose url, cluster and SSL settings replace url, cluster and verify_SSL
+        **kwargs (any): Arguments of `Search`
+
+    Raises:
+        ValueError: If `windows` or `cache` are passed, or on `export`, `windowRanges` and `windowPages`
+
+    Attributes:
+        client (AsyncClient): Async client holding the pooled connections used by the requests
+        See `Search`
+
+    Examples:
+        >>> import asyncio
+        >>> import avantpy
+        >>> async def main():
+        ...     s = avantpy.download.AsyncSearch('https://prod.avantdata.com.br', index='avantscan_results')
+        ...     await s.search()
+        ...     await s.client.close()
+        ...     return s
+        >>> asyncio.run(main())
+        <44639 dictionaries downloaded in data attribute>
+    """
+
+    def __init__(self,
+                 url: Optional[str] = '',
+                 client: Optional[AsyncClient] = None,
+                 **kwargs: Any):
+        if kwargs.get('windows', 1) > 1 or kwargs.get('cache'):
+            raise ValueError('AsyncSearch does not support windows or cache')
+        kwargs.pop('lazy', None)
+        client = client or AsyncClient(url,
+                                       cluster=kwargs.get('cluster', 'AvantData'),
+                                       verify_SSL=kwargs.get('verify_SSL', False),
+                                       compress=kwargs.get('compress', False))
+        super().__init__(client=client, lazy=True, **kwargs)
+
+    @classmethod
+    async def batch(cls,
+                    queries: List[dict],
+                    concurrency: Optional[int] = 4,
+                    **kwargs: Any) -> List['AsyncSearch']:
+        """Runs many searches concurrently in the event loop sharing one client. See `Search.batch`"""
+        if not kwargs.get('client'):
+            kwargs['client'] = AsyncClient(utils.get_url(kwargs.get('url', '')),
+                                           cluster=kwargs.get('cluster', 'AvantData'),
+                                           verify_SSL=kwargs.get('verify_SSL', False),
+                                           compress=kwargs.get('compress', False))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(query):
+            search = cls(**cls.batchArguments(query, kwargs))
+            async with semaphore:
+                await search.search()
+            return search
+        searches = await asyncio.gather(*(run(query) for query in queries))
+        logging.getLogger(__name__).info('{} queries returned {} documents in {} ms'.format(
+            len(searches), sum(len(s.data) for s in searches), sum(s.took for s in searches)))
+        return list(searches)
+
+    async def request(self, api: str, payload: dict, retry: Optional[bool] = True) -> Any:
+        """Posts the payload to an endpoint of the api and returns the parsed response. See `Search.request`
+
+        Args:
+            api: Endpoint to be joined to the url
+            payload: Object to be sent as JSON in the request body
+            retry: Retry transient errors. Scroll requests are not retried, as the scroll may have advanced
+
+        Returns:
+            The parsed JSON response
+
+        Raises:
+            requests.HTTPError: If the response status code is 400 or over
+        """
+        import aiohttp
+        attempt = 0
+        while True:
+            try:
+                status, content = await self.client.post(api, data=codec.dumps(payload))
+                if status >= 400:
+                    raise requests.HTTPError('{} Error for url: {}'.format(status, self.url+api))
+                return codec.loads(content)
+            except (requests.HTTPError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                transient = utils.retryable(status) if isinstance(e, requests.HTTPError) else True
+                if not retry or not transient or attempt >= self.retries:
+                    raise
+                await self.wait(attempt, e)
+                attempt += 1
+
+    async def wait(self, attempt: int, error: Any):
+        """Sleeps the `backoff` of an attempt before retrying a failed request."""
+        delay = utils.backoff(attempt, self.backoff)
+        self.log.warning('{}. Retrying in {:.1f} seconds ({}/{})'.format(
+            error, delay, attempt + 1, self.retries))
+        self.retried += 1
+        await asyncio.sleep(delay)
+
+    async def aggregate(self, aggs: dict) -> dict:
+        """Runs aggregations over the documents matching the query without downloading them. See `Search.aggregate`"""
+        return self.aggregations(await self.request(self.api_custom, self.countQuery(aggs)))
+
+    async def count(self) -> int:
+        """Counts the documents matching the query without downloading them. See `Search.count`"""
+        self.aggregations(await self.request(self.api_custom, self.countQuery()))
+        self.log.info('Total of {} documents found'.format(self.total))
+        return self.total
+
+    async def histogram(self, interval: Optional[str] = None, size: Optional[int] = 1000) -> Dict[str, int]:
+        """Counts the documents matching the query by index or by time bucket. See `Search.histogram`"""
+        return self.histogramBuckets(await self.aggregate(self.histogramAggs(interval, size)))
+
+    async def search(self) -> Any:
+        """Downloads all documents of the query, or the memory value, into the `data` attribute.
+
+        Returns:
+            The `data` attribute
+        """
+        if self.mode == 'count':
+            await self.count()
+            return self.data
+        if self.memory:
+            await self.memory_search()
+            self.raw = self.data
+        elif self.output == 'columns' and (self.composite or not self.aggs):
+            self.data = await self.searchColumns()
+        else:
+            async for hits in self.pages():
+                self.data.extend(hits)
+            self.raw = self.data
+            self.data = self.formatData()
+        self.log.info('{} downloaded documents'.format(len(self.data)))
+        if self.compress:
+            self.log.info(self.client.compression())
+        return self.data
+
+    async def scrollSearch(self):
+        """Downloads the rest of the scroll search into the `data` attribute. See `Search.scrollSearch`"""
+        async for hits in self.scrollPages(len(self.data)):
+            self.data.extend(hits)
+
+    async def searchColumns(self) -> Columns:
+        """Downloads the documents page by page straight into column buffers. See `Search.searchColumns`"""
+        columns = Columns(dates=self.dates)
+        async for page in self.iter_pages():
+            columns.extend(page)
+        return columns
+
+    def windowPages(self, *args: Any, **kwargs: Any):
+        """Not supported, as `windows` are not. Raises ValueError"""
+        raise ValueError('AsyncSearch does not support windows')
+
+    def windowRanges(self, *args: Any, **kwargs: Any):
+        """Not supported, as `windows` are not. Raises ValueError"""
+        raise ValueError('AsyncSearch does not support windows')
+
+    def export(self, *args: Any, **kwargs: Any):
+        """Not supported: write the pages of `iter_pages` instead. Raises ValueError"""
+        raise ValueError('AsyncSearch does not support export. Write the pages of iter_pages instead')
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields the raw hits page by page with the configured `pagination` and `slices`. See `Search.pages`"""
+        self.failures = 0
+        pages = self.queryPages()
+        tracked = not self.aggs or self.composite
+        progress = self.progress()
+        async for hits in pages:
+            if tracked:
+                self.track(progress, hits)
+            yield hits
+        if tracked:
+            self.finish(progress)
+
+    async def drive(self, pager: Generator[tuple, Any, None]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Runs the steps of a pager awaiting its requests and yields its pages.
+
+        The `searchPages`, `scrollPages`, `searchAfterPages` and `compositePages` of `Search` return this
+        async iterator, so both classes share their pagers. See `Search.drive`
+        """
+        try:
+            step = next(pager)
+            while True:
+                if step[0] == 'page':
+                    yield step[1]
+                    step = next(pager)
+                elif step[0] == 'wait':
+                    await self.wait(*step[1:])
+                    step = next(pager)
+                else:
+                    try:
+                        responseJson = await self.request(*step[1:])
+                    except Exception as e:
+                        step = pager.throw(e)
+                    else:
+                        step = pager.send(responseJson)
+        except StopIteration:
+            return
+        finally:
+            pager.close()
+
+    async def slicedPages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of all slices as soon as any of them arrives, with one task per slice."""
+        self.total = 0
+        pages = asyncio.Queue(maxsize=self.slices*2)
+        done = object()
+
+        async def drain(sliceID):
+            try:
+                async for hits in self.searchPages(sliceID):
+                    await pages.put(hits)
+            except Exception:
+                self.log.error('Failed to search slice {} of {}'.format(
+                    sliceID + 1, self.index), exc_info=True)
+                self.addFailure()
+            await pages.put(done)
+
+        tasks = [asyncio.ensure_future(drain(sliceID)) for sliceID in range(self.slices)]
+        finished = 0
+        try:
+            while finished < self.slices:
+                hits = await pages.get()
+                if hits is done:
+                    finished += 1
+                else:
+                    yield hits
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_pages(self, raw: Optional[bool] = False) -> AsyncIterator[List[Any]]:
+        """Yields the downloaded documents page by page without accumulating them in `data`. See `Search.iter_pages`"""
+        if self.memory:
+            await self.memory_search()
+            yield self.data
+            return
+        async for hits in self.pages():
+            yield hits if raw else self.formatData(hits)
+
+    async def iter_docs(self) -> AsyncIterator[Any]:
+        """Yields the formatted documents one by one, downloading a page at a time."""
+        async for page in self.iter_pages():
+            for doc in page:
+                yield doc
+
+    async def memory_search(self) -> Optional[List[Any]]:
+        """Searches for the stored data in memory by the given key. See `Search.memory_search`"""
+        text = self.memory_cache.get(self.url, self.key) if self.memory_cache else None
+        if text is not None:
+            return self.readValue(text)
+        text = await self.memoryRequest(self.key)
+        count = codec.chunks(text)
+        parts = None
+        if count:
+            parts = await asyncio.gather(*(self.memoryRequest(key)
+                                           for key in codec.chunk_keys(self.key, count)))
+        return self.memoryValue(text, parts)
+
+    async def memoryRequest(self, key: str) -> Optional[str]:
+        """Returns the string stored in memory by a key, or None if the search failed."""
+        payload = {
+            'key': key
+        }
+        try:
+            status, content = await self.client.post(self.api_memory, data=codec.dumps(payload))
+            self.log.debug(content)
+            if status < 400:
+                return codec.loads(content)
+            self.log.warning('Response error. Status code: {}'.format(status))
+        except Exception:
+            self.log.error('Error searching in memory.')
+        return None
@@ -0,0 +1,191 @@
+from .. import codec
+from .. import utils
+import tempfile
+import logging
+import json
+import gzip
+import time
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Cache:
+    """Query Cache
+
+    A class to keep the pages downloaded by `Search` on disk, so the same query is not downloaded again while fresh
+
+    Each entry is a gzip file with one page per line and a JSON file with its metadata, named by the
+    hash of the canonical query. Queries containing `now`, such as the default `GenerateTime` filter,
+    are only fresh for `stale` seconds. The least recently used entries are removed when the cache
+    grows over `max_size` bytes.
+
+    Args:
+        path (str, optional): Directory where the entries are stored
+        ttl (int, optional): Seconds an entry stays fresh
+        stale (int, optional): Seconds an entry of a query using `now` stays fresh
+        max_size (int, optional): Bytes stored before the least recently used entries are removed
+
+    Attributes:
+        path (str): Directory where the entries are stored
+        ttl (int): Seconds an entry stays fresh
+        stale (int): Seconds an entry of a query using `now` stays fresh
+        max_size (int): Bytes stored before the least recently used entries are removed
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> cache = avantpy.download.Cache(ttl=900, stale=300)
+        >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', cache=cache)
+        INFO:avantpy.download.Search:Searching IANA in https://prod.avantdata.com.br
+        ...
+        >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', cache=cache)
+        INFO:avantpy.download.Cache:Reading 56039 documents from cache 3f2a...
+        INFO:avantpy.download.Search:56039 downloaded documents
+    """
+
+    def __init__(self,
+                 path: Optional[str] = os.path.join(os.path.expanduser('~'), '.cache', 'avantpy'),
+                 ttl: Optional[int] = 3600,
+                 stale: Optional[int] = 300,
+                 max_size: Optional[int] = 1 << 30):
+        self.log = logging.getLogger(__name__)
+        self.path = path
+        self.ttl = ttl
+        self.stale = stale
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return '<Cache in {} with {}>'.format(self.path, self.size())
+
+    def key(self, *args: Any) -> str:
+        """Returns the hash of the canonical JSON of the arguments
+
+        Args:
+            args: Objects identifying the query, such as url and query body
+
+        Returns:
+            The sha256 hexadecimal hash
+        """
+        return utils.canonical_hash(*args)
+
+    def expiration(self, query: Any) -> int:
+        """Returns the seconds an entry of the query stays fresh, `stale` if it uses `now`"""
+        if 'now' in json.dumps(query, default=str):
+            return min(self.ttl, self.stale)
+        return self.ttl
+
+    def files(self, key: str) -> Tuple[str, str]:
+        """Returns the paths of the pages and metadata files of an entry"""
+        return os.path.join(self.path, key+'.gz'), os.path.join(self.path, key+'.json')
+
+    def read(self, key: str) -> Optional[Tuple[Dict[str, Any], Iterator[List[Any]]]]:
+        """Reads a fresh entry
+
+        Args:
+            key: Hash of the query
+
+        Returns:
+            The metadata of the entry and an iterator over its pages, or None if there is no fresh entry
+        """
+        pagesFile, metaFile = self.files(key)
+        try:
+            with open(metaFile) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('expires', 0) < time.time() or not os.path.exists(pagesFile):
+            self.remove(key)
+            return None
+        os.utime(metaFile)
+        self.log.info('Reading {} documents from cache {}'.format(meta.get('documents'), key))
+
+        def pages():
+            with gzip.open(pagesFile, 'rb') as f:
+                for line in f:
+                    yield codec.loads(line)
+        return meta, pages()
+
+    def write(self,
+              key: str,
+              pages: Iterator[List[Any]],
+              expiration: int,
+              complete: Optional[Callable[[int], bool]] = None,
+              **meta: Any) -> Iterator[List[Any]]:
+        """Yields the pages while writing them to a new entry
+
+        The entry is only stored when all pages were consumed and complete accepts the download, so
+        interrupted, failed or partial downloads are not cached.
+
+        Args:
+            key: Hash of the query
+            pages: Pages to be yielded and stored
+            expiration: Seconds the entry stays fresh
+            complete: Callable receiving the number of documents written and returning whether the download is complete
+            meta: Callables returning metadata to be stored with the entry once the pages were consumed
+
+        Yields:
+            Each page of pages
+        """
+        pagesFile, metaFile = self.files(key)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        documents = 0
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for page in pages:
+                    f.write(codec.dumps(page) + b'\n')
+                    documents += len(page)
+                    yield page
+            if complete is not None and not complete(documents):
+                self.log.warning('Cache entry {} not stored: incomplete download of {} documents'.format(
+                    key, documents))
+                return
+            os.replace(tmp, pagesFile)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        entry = {k: v() for k, v in meta.items()}
+        entry.update({'documents': documents,
+                      'created': time.time(),
+                      'expires': time.time() + expiration})
+        with open(metaFile, 'w') as f:
+            json.dump(entry, f)
+        self.evict()
+
+    def remove(self, key: str):
+        """Removes an entry"""
+        for file in self.files(key):
+            if os.path.exists(file):
+                os.remove(file)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Returns the last access time, size and key of each entry, least recently used first"""
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.json'):
+                key = name[:-5]
+                try:
+                    size = sum(os.path.getsize(file) for file in self.files(key))
+                    entries.append((os.path.getmtime(self.files(key)[1]), size, key))
+                except OSError:
+                    continue
+        return sorted(entries)
+
+    def size(self) -> int:
+        """Returns the bytes stored by all entries"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in `max_size`"""
+        entries = self.entries()
+        size = sum(size for _, size, _ in entries)
+        for _, entrySize, key in entries:
+            if size <= self.max_size:
+                break
+            self.log.info('Evicting cache entry {}'.format(key))
+            self.remove(key)
+            size -= entrySize
+
+    def clear(self):
+        """Removes all entries"""
+        for _, _, key in self.entries():
+            self.remove(key)
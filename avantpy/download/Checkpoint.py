@@ -0,0 +1,74 @@
+from .. import utils
+import sqlite3
+import logging
+import json
+import time
+import os
+from typing import Any, List, Optional
+
+
+class Checkpoint:
+    """Checkpoint Store
+
+    A class to persist the highest value of the sort field downloaded by each query, so later runs of
+    `Search` only download newer documents
+
+    The values are kept in a SQLite database, which can be shared by processes in the same machine.
+
+    Args:
+        path (str, optional): Path of the SQLite database file
+
+    Attributes:
+        path (str): Path of the SQLite database file
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> checkpoint = avantpy.download.Checkpoint()
+        >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', checkpoint=checkpoint)
+        INFO:avantpy.download.Search:Total of 56039 documents found
+        ...
+        INFO:avantpy.download.Search:Checkpoint of IANA set to 1668606445000
+        >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', checkpoint=checkpoint)
+        INFO:avantpy.download.Search:Searching IANA after checkpoint 1668606445000
+        INFO:avantpy.download.Search:Total of 12 documents found
+    """
+
+    def __init__(self,
+                 path: Optional[str] = os.path.join(os.path.expanduser('~'), '.cache', 'avantpy', 'checkpoints.db')):
+        self.log = logging.getLogger(__name__)
+        self.path = path
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.execute('CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, value TEXT, updated REAL)')
+
+    def __repr__(self):
+        return '<Checkpoint store in {}>'.format(self.path)
+
+    def execute(self, sql: str, *parameters: Any) -> List[tuple]:
+        """Executes a statement in its own transaction and returns the fetched rows"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def key(self, *args: Any) -> str:
+        """Returns the hash identifying a query. See `utils.canonical_hash`"""
+        return utils.canonical_hash(*args)
+
+    def get(self, key: str) -> Any:
+        """Returns the stored value of a key, or None if there is none"""
+        rows = self.execute('SELECT value FROM checkpoints WHERE key = ?', key)
+        if rows:
+            return json.loads(rows[0][0])
+        return None
+
+    def set(self, key: str, value: Any):
+        """Stores the value of a key"""
+        self.execute('INSERT OR REPLACE INTO checkpoints (key, value, updated) VALUES (?, ?, ?)',
+                     key, json.dumps(value), time.time())
+
+    def remove(self, key: str):
+        """Removes the value of a key, so the next search downloads all documents again"""
+        self.execute('DELETE FROM checkpoints WHERE key = ?', key)
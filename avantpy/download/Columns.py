@@ -0,0 +1,132 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+
+class Columns:
+    """Columns
+
+    A class to build one buffer per field from documents, page by page
+
+    Integer and float fields are kept in typed arrays ('q' and 'd'), so millions of values take
+    8 bytes each. Fields with any other type, or with mixed types, are kept in lists. Missing
+    values are None in lists and NaN in float arrays; an integer array with a missing value
+    becomes a float array.
+
+    Args:
+        dates (list(str), optional): Fields with epoch millis to be converted to datetime64 by `to_numpy` and `to_pandas`
+
+    Attributes:
+        columns (dict): Buffer of each field, as an array or a list
+        length (int): Number of documents added
+        dates (list(str)): Fields with epoch millis to be converted to datetime64 by `to_numpy` and `to_pandas`
+
+    Examples:
+        >>> columns = Columns(dates=['GenerateTime'])
+        >>> columns.extend([{'id': 'a', 'GenerateTime': 1668606445000}, {'id': 'b', 'port': 80}])
+        >>> columns.to_dict()
+        {'id': ['a', 'b'], 'GenerateTime': [1668606445000.0, nan], 'port': [nan, 80.0]}
+        >>> columns.to_numpy()['GenerateTime']
+        array(['2022-11-16T13:47:25.000', 'NaT'], dtype='datetime64[ms]')
+    """
+
+    def __init__(self, dates: Optional[List[str]] = []):
+        self.columns = {}
+        self.length = 0
+        self.dates = dates
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return '<{} documents in {} columns>'.format(self.length, len(self.columns))
+
+    def newColumn(self, value: Any) -> Union[array, list]:
+        """Returns an empty buffer for the type of the first value of a field"""
+        if type(value) is int and -2**63 <= value < 2**63:
+            return array('q')
+        if type(value) is float:
+            return array('d')
+        return []
+
+    def pad(self, key: str, length: int) -> Union[array, list]:
+        """Fills a column with missing values up to length"""
+        column = self.columns[key]
+        missing = length - len(column)
+        if missing > 0:
+            if isinstance(column, array) and column.typecode == 'q':
+                column = self.columns[key] = array('d', column)
+            if isinstance(column, array):
+                column.extend([float('nan')] * missing)
+            else:
+                column.extend([None] * missing)
+        return column
+
+    def promote(self, key: str, value: Any) -> Union[array, list]:
+        """Converts the column of a key to a type that can store value"""
+        column = self.columns[key]
+        if column.typecode == 'q' and type(value) is float:
+            column = self.columns[key] = array('d', column)
+        else:
+            column = self.columns[key] = column.tolist()
+        return column
+
+    def append(self, key: str, value: Any):
+        """Appends the value of a field to its column at the current row"""
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = self.newColumn(value)
+        if value is None:
+            self.pad(key, self.length + 1)
+            return
+        if len(column) < self.length:
+            column = self.pad(key, self.length)
+        try:
+            column.append(value)
+        except (TypeError, OverflowError):
+            column = self.promote(key, value)
+            column.append(value)
+
+    def extend(self, documents: Iterable[Mapping[str, Any]]):
+        """Adds documents to the columns
+
+        Args:
+            documents: Dictionaries, such as a page of `Search.formatData`
+        """
+        for document in documents:
+            for key, value in document.items():
+                self.append(key, value)
+            self.length += 1
+
+    def to_dict(self) -> Dict[str, list]:
+        """Returns the columns as lists with the same length"""
+        return {key: self.pad(key, self.length).tolist() if isinstance(self.columns[key], array)
+                else self.pad(key, self.length) for key in self.columns}
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Returns the columns as NumPy arrays
+
+        Typed columns become int64 or float64 arrays, or datetime64[ms] if listed in `dates`.
+        Other columns become object arrays.
+
+        Returns:
+            Dictionary with a NumPy array for each field
+        """
+        import numpy as np
+        arrays = dict()
+        for key in self.columns:
+            column = self.pad(key, self.length)
+            if isinstance(column, array):
+                values = np.array(column, dtype=np.int64 if column.typecode == 'q' else np.float64)
+                if key in self.dates:
+                    values = values.astype('datetime64[ms]')
+            else:
+                values = np.empty(len(column), dtype=object)
+                for i, value in enumerate(column):
+                    values[i] = value
+            arrays[key] = values
+        return arrays
+
+    def to_pandas(self) -> Any:
+        """Returns the columns as a pandas DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self.to_numpy(), copy=False)
@@ -0,0 +1,71 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class Hit(Mapping):
+    """Hit
+
+    A read-only dictionary view of an elasticsearch hit
+
+    The keys 'id', 'type' and 'index' and the fields of '_source' are read from the original hit
+    when accessed, so no new dictionary is built for each document. Fields of '_source' take precedence
+    over the metadata keys, as in `Search.formatData`.
+
+    Args:
+        hit (dict): Elasticsearch hit with '_id', '_type', '_index' and '_source'
+
+    Attributes:
+        hit (dict): Elasticsearch hit with '_id', '_type', '_index' and '_source'
+
+    Examples:
+        >>> hit = Hit({'_id': 'a1', '_type': 'iana', '_index': 'iana', '_source': {'serviceName': 'arn'}})
+        >>> hit['id'], hit['serviceName']
+        ('a1', 'arn')
+        >>> dict(hit)
+        {'id': 'a1', 'type': 'iana', 'index': 'iana', 'serviceName': 'arn'}
+    """
+
+    __slots__ = ('hit',)
+    meta = {'id': '_id', 'type': '_type', 'index': '_index'}
+
+    def __init__(self, hit: Dict[str, Any]):
+        self.hit = hit
+
+    def __getitem__(self, key: str) -> Any:
+        source = self.hit.get('_source') or {}
+        if key in source:
+            return source[key]
+        field = self.meta.get(key)
+        if field in self.hit:
+            return self.hit[field]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        source = self.hit.get('_source') or {}
+        for key, field in self.meta.items():
+            if field in self.hit or key in source:
+                yield key
+        for key in source:
+            if key not in self.meta:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return 'Hit({})'.format(dict(self))
+
+    @property
+    def id(self) -> str:
+        """Id of the document"""
+        return self.hit.get('_id')
+
+    @property
+    def type(self) -> str:
+        """Type of the document"""
+        return self.hit.get('_type')
+
+    @property
+    def index(self) -> str:
+        """Index of the document"""
+        return self.hit.get('_index')
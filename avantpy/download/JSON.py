@@ -1,4 +1,6 @@
+from ..Client import Client
 from .. import utils
+from .. import codec
 import requests
 import logging
 from typing import Optional, Union, List, Tuple, Set, Type
@@ -12,6 +14,7 @@ class JSON:
         request (str or list(str)): URLs containing JSON objects to be downloaded
         select (str or list(str), optional): Select only specified keys to download
         headers (dict, optional): Headers to be sent in the request
+        client (Client, optional): Shared client whose pooled session is used for the requests
 
     Attributes:
         data (list(dict)): Downloaded JSONs as a list of dictionaries
@@ -20,6 +23,7 @@ class JSON:
         select (str or list(str)): Select only specified keys to download
         headers (dict): headers to be sent in the request
         log (logger): Logger with __name__
+        session (Session): Session keeping the connections alive between requests
 
     Examples:
         >>> import avantpy
@@ -41,13 +45,16 @@ class JSON:
                      "Accept-Language": "en-US",
                      "User-Agent": "Mozilla/5.0 (Windows NT 10.0; WOW64; rv:60.0) Gecko/20100101 Firefox/60.0",
                      "X-Requested-With": "XMLHttpRequest",
-                 }):
+                 },
+                 client: Optional[Client] = None,
+                 **kwargs):
         self.log = logging.getLogger(__name__)
         self.request = request if isinstance(
             request, (list, tuple, set)) else [request]
         self.select = select if isinstance(
             select, (list, tuple, set)) else [select]
         self.headers = headers
+        self.session = client.session if client else requests.Session()
         self.responseStatus = []
         self.data = []
         self.bulkRead()
@@ -59,9 +66,9 @@ class JSON:
         try:
             if url:
                 self.log.info('Reading {}'.format(url))
-                response = requests.get(url, headers=self.headers)
+                response = self.session.get(url, headers=self.headers)
             self.responseStatus.append(response.status_code)
-            responseJson = response.json()
+            responseJson = codec.loads(response.content)
             data = utils.get_data(responseJson, *self.select)
             if not isinstance(data, (list, tuple, set)):
                 data = [data]
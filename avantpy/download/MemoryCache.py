@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import threading
+import sqlite3
+import logging
+import time
+import os
+from typing import List, Optional
+
+
+class MemoryCache:
+    """Memory Cache
+
+    A least recently used cache of the values stored in AvantData memory, read by `Search` in memory mode
+    before requesting the api
+
+    Entries keep the string stored by `upload.Memory`, so each read returns new objects. An entry lives
+    for the `expire` the value was written with when it was uploaded through a `upload.Memory` sharing
+    the cache, and for `ttl` seconds otherwise. With a path, entries are also kept in a SQLite database
+    shared by the processes of the machine.
+
+    Args:
+        maxsize (int, optional): Number of entries kept, in process and on disk
+        ttl (int, optional): Seconds an entry read from the api stays fresh
+        path (str, optional): SQLite database file shared by processes. If None, entries are only kept in process
+
+    Attributes:
+        maxsize (int): Number of entries kept, in process and on disk
+        ttl (int): Seconds an entry read from the api stays fresh
+        path (str): SQLite database file shared by processes
+        entries (OrderedDict): Expiration time and string of each entry kept in process, least recently used first
+        lock (Lock): Lock guarding the entries shared by threads
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> cache = avantpy.download.MemoryCache(ttl=60)
+        >>> avantpy.upload.Memory('blocklist', ['10.0.0.1'], cache=cache, expire=600).upload()
+        >>> avantpy.download.Search(memory=True, key='blocklist', memory_cache=cache).data
+        ['10.0.0.1']
+    """
+
+    def __init__(self,
+                 maxsize: Optional[int] = 1024,
+                 ttl: Optional[int] = 60,
+                 path: Optional[str] = None):
+        self.log = logging.getLogger(__name__)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if self.path:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.execute('CREATE TABLE IF NOT EXISTS memory '
+                         '(key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)')
+
+    def __repr__(self):
+        return '<MemoryCache with {} entries>'.format(len(self.entries))
+
+    def execute(self, sql: str, *parameters: object) -> List[tuple]:
+        """Executes a statement in the shared database in its own transaction and returns the fetched rows"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def name(self, url: str, key: str) -> str:
+        """Returns the name of the entry of a memory key in an AvantData url"""
+        return '{} {}'.format(url, key)
+
+    def get(self, url: str, key: str) -> Optional[str]:
+        """Returns the fresh string of a memory key, or None if it is not cached
+
+        Args:
+            url: AvantData URL
+            key: Memory key
+
+        Returns:
+            The string stored by `upload.Memory`, to be parsed by `codec.unpack`
+        """
+        name = self.name(url, key)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(name)
+                    return entry[1]
+                del self.entries[name]
+        if not self.path:
+            return None
+        rows = self.execute('SELECT value, expires FROM memory WHERE key = ? AND expires > ?', name, now)
+        if not rows:
+            return None
+        value, expires = rows[0]
+        self.execute('UPDATE memory SET accessed = ? WHERE key = ?', now, name)
+        self.remember(name, value, expires)
+        return value
+
+    def set(self, url: str, key: str, value: str, ttl: Optional[int] = None):
+        """Caches the string of a memory key
+
+        Args:
+            url: AvantData URL
+            key: Memory key
+            value: String stored by `upload.Memory`
+            ttl: Seconds the entry stays fresh. Defaults to `ttl`
+        """
+        name = self.name(url, key)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        self.remember(name, value, expires)
+        if self.path:
+            self.execute('INSERT OR REPLACE INTO memory (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                         name, value, expires, now)
+            self.execute('DELETE FROM memory WHERE expires <= ? OR key IN (SELECT key FROM memory '
+                         'ORDER BY accessed DESC LIMIT -1 OFFSET ?)', now, self.maxsize)
+
+    def remember(self, name: str, value: str, expires: float):
+        """Keeps an entry in process, removing the least recently used entries over `maxsize`"""
+        with self.lock:
+            self.entries[name] = (expires, value)
+            self.entries.move_to_end(name)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, url: str, key: str):
+        """Removes the entry of a memory key"""
+        name = self.name(url, key)
+        with self.lock:
+            self.entries.pop(name, None)
+        if self.path:
+            self.execute('DELETE FROM memory WHERE key = ?', name)
+
+    def clear(self):
+        """Removes all entries"""
+        with self.lock:
+            self.entries.clear()
+        if self.path:
+            self.execute('DELETE FROM memory')
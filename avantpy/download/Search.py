@@ -1,9 +1,23 @@
 from urllib3.exceptions import InsecureRequestWarning
-import socket
+from ..Client import Client
+from .Hit import Hit
+from .Columns import Columns
+from .Cache import Cache
+from .Checkpoint import Checkpoint
+from .MemoryCache import MemoryCache
+from .. import utils
+from .. import codec
+import concurrent.futures
+import threading
+import time
+import queue
+import copy
+import gzip
+import csv
+import os
 import requests
 import logging
-import json
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Iterator, Tuple, Callable, Generator
 
 class Search:
     """Search
@@ -22,8 +36,26 @@ class Search:
         size (int, optional): Number of documents to be searched (max 5000)
         max_size (int, optional): Number of documents to start scroll search
         seed_time (str, optional): Period to retain the search context for scrolling,
+        lazy (bool, optional): Do not download on instantiation. Use `iter_pages`, `iter_docs` or `search` instead
+        slices (int, optional): Number of sliced scrolls to be downloaded concurrently
+        pagination (str, optional): 'scroll' to page with scroll contexts or 'search_after' to page with sort values
+        tiebreaker (str, optional): Unique field added to the sort to page with 'search_after'
+        client (Client, optional): Shared client whose url, cluster and SSL settings replace url, cluster and verify_SSL
+        views (bool, optional): Format documents as read-only `Hit` views over the raw hits instead of new dictionaries
+        output (str, optional): 'records' to download a list of dictionaries or 'columns' to download `Columns` buffers
+        dates (list(str), optional): Fields with epoch millis converted to datetime64 by `to_numpy` and `to_pandas`
+        cache (Cache, optional): Cache to read fresh pages of the same query from disk instead of downloading them
+        windows (int, optional): Number of ranges of the `sort` field to be downloaded concurrently
+        window_mode (str, optional): 'even' to split the windows by length or 'adaptive' to split them by number of documents
+        checkpoint (Checkpoint, optional): Store of the highest `sort` value downloaded, to only download newer documents in later runs
+        retries (int, optional): Number of retries of a request failing with a transient error, and of resumes of a lost scroll
+        backoff (float, optional): Seconds to wait before the first retry, doubled on each attempt
+        mode (str, optional): 'download' to download the documents or 'count' to only set `total` on instantiation
+        flatten (bool, optional): Format the buckets of a composite aggregation in `aggs` as rows with their keys, doc_count and metrics
+        memory_cache (MemoryCache, optional): Cache of memory values read before requesting the api in memory mode
+        compress (bool, optional): Gzip the query payloads, ask for gzipped responses and log their compression ratio. See `Client`
     Attributes:
-        data (list(dict)): Downloaded documents as a list of dictionaries
+        data (list(dict) or Columns): Downloaded documents as a list of dictionaries, or as `Columns` if output is 'columns'
         url (str): AvantData URL
         index (str): Index where the documents are
         must (str): Must query_string from elasticsearch
@@ -35,10 +67,38 @@ class Search:
         api_scroll (str): Endpoint where the connection with scroll search is set
         cluster (str): Header parameter for communication with the api
         verify_SSL (bool): Bool to verify SSL of requests
+        compress (bool): Gzip the query payloads, ask for gzipped responses and log their compression ratio
         size (int): Number of documents to be searched (max 5000)
         max_size (int): Number of documents to start scroll search
         seed_time (str): Period to retain the search context for scrolling,
         took (int): Time elasticsearch took to process the query on its side
+        total (int): Total of documents found by the query
+        lazy (bool): Do not download on instantiation
+        slices (int): Number of sliced scrolls to be downloaded concurrently
+        pagination (str): 'scroll' to page with scroll contexts or 'search_after' to page with sort values
+        tiebreaker (str): Unique field added to the sort to page with 'search_after'
+        client (Client): Client holding the pooled connections used by the requests
+        views (bool): Format documents as read-only `Hit` views over the raw hits instead of new dictionaries
+        output (str): 'records' to download a list of dictionaries or 'columns' to download `Columns` buffers
+        dates (list(str)): Fields with epoch millis converted to datetime64 by `to_numpy` and `to_pandas`
+        cache (Cache): Cache to read fresh pages of the same query from disk instead of downloading them
+        windows (int): Number of ranges of the `sort` field to be downloaded concurrently
+        window_mode (str): 'even' to split the windows by length or 'adaptive' to split them by number of documents
+        checkpoint (Checkpoint): Store of the highest `sort` value downloaded, to only download newer documents in later runs
+        checkpointKey (str): Hash of the query identifying its value in `checkpoint`
+        mark (any): Highest `sort` value downloaded by the previous run, added to the filter as a 'gt' bound
+        retries (int): Number of retries of a request failing with a transient error, and of resumes of a lost scroll
+        backoff (float): Seconds to wait before the first retry, doubled on each attempt
+        mode (str): 'download' to download the documents or 'count' to only set `total` on instantiation
+        flatten (bool): Format the buckets of a composite aggregation in `aggs` as rows with their keys, doc_count and metrics
+        composite (str): Name of the composite aggregation in `aggs`, whose buckets are downloaded page by page
+        memory_cache (MemoryCache): Cache of memory values read before requesting the api in memory mode
+        retried (int): Number of requests retried
+        resumed (int): Number of scrolls resumed from the last sort value after losing their context
+        failures (int): Number of requests, slices or windows of the last download that failed, so it is not complete
+        outcome (dict): Status ('complete', 'partial' or 'failed') and counts of the last download
+        raw (list(dict)): Downloaded documents as returned by elasticsearch
+        lock (Lock): Lock guarding the attributes shared by the slice threads
     Examples:
         >>> import logging
         >>> logging.basicConfig(level=logging.INFO)
@@ -81,9 +141,32 @@ class Search:
                  aggs: Optional[dict] = {},
                  includes: Optional[list] = [],
                  ignore_unavailable: Optional[bool] = True,
+                 lazy: Optional[bool] = False,
+                 slices: Optional[int] = 1,
+                 pagination: Optional[str] = 'scroll',
+                 tiebreaker: Optional[str] = '_id',
+                 client: Optional[Client] = None,
+                 views: Optional[bool] = False,
+                 output: Optional[str] = 'records',
+                 dates: Optional[List[str]] = ['GenerateTime'],
+                 cache: Optional[Cache] = None,
+                 windows: Optional[int] = 1,
+                 window_mode: Optional[str] = 'even',
+                 checkpoint: Optional[Checkpoint] = None,
+                 retries: Optional[int] = 3,
+                 backoff: Optional[float] = 0.5,
+                 mode: Optional[str] = 'download',
+                 flatten: Optional[bool] = False,
+                 memory_cache: Optional[MemoryCache] = None,
+                 compress: Optional[bool] = False,
                  **kwargs: Any):
         self.log = logging.getLogger(__name__)
-        self.url = self.get_url(url)
+        self.client = client or Client(self.get_url(url),
+                                       cluster=cluster,
+                                       verify_SSL=verify_SSL,
+                                       pool_maxsize=max(10, slices, windows),
+                                       compress=compress)
+        self.url = self.client.url
         self.index = index
         self.must = must
         self.must_not = must_not
@@ -93,32 +176,146 @@ class Search:
         self.api_custom = api_custom
         self.api_scroll = api_scroll
         self.api_memory = api_memory
-        self.cluster = cluster
-        self.verify_SSL = verify_SSL
+        self.cluster = self.client.cluster
+        self.verify_SSL = self.client.verify_SSL
+        self.compress = self.client.compress
         self.size = size
         self.max_size = max_size
         self.seed_time = seed_time
         self.aggs = aggs
         self.includes = includes
         self.ignore_unavailable = 'true' if ignore_unavailable else 'false'
+        self.lazy = lazy
+        self.slices = slices
+        self.pagination = pagination
+        self.tiebreaker = tiebreaker
+        self.views = views
+        self.output = output
+        self.dates = dates
+        self.cache = cache
+        self.windows = windows
+        self.window_mode = window_mode
+        self.retries = retries
+        self.backoff = backoff
+        self.mode = mode
+        self.flatten = flatten
+        self.memory_cache = memory_cache
+        self.composite = next((name for name, agg in (aggs or {}).items() if 'composite' in agg), None)
+        self.retried = 0
+        self.resumed = 0
+        self.failures = 0
+        self.outcome = {}
+        self.lock = threading.Lock()
         self.key = kwargs.get('key', self.index)
         self.query = kwargs.get('query', self.makeQuery())
+        self.checkpoint = checkpoint
+        self.checkpointKey = None
+        self.mark = None
+        if self.checkpoint and not self.aggs:
+            self.checkpointKey = self.checkpoint.key(self.url, self.cluster, self.query)
+            self.mark = self.checkpoint.get(self.checkpointKey)
+            if self.mark is not None:
+                self.log.info('Searching {} after checkpoint {}'.format(self.index, self.mark))
+                self.query = self.filteredQuery({'range': {self.sort: {'gt': self.mark}}})
         self.data = []
+        self.raw = []
         self.took = 0
+        self.total = 0
         requests.packages.urllib3.disable_warnings(
             category=InsecureRequestWarning)
+        if self.lazy:
+            return
+        if self.mode == 'count':
+            try:
+                self.count()
+            except Exception:
+                self.log.error('Failed to count {} in {}'.format(
+                    self.index, self.url), exc_info=True)
+            return
         if self.memory:
             self.memory_search()
             self.raw = self.data
+        elif self.output == 'columns' and (self.composite or not self.aggs):
+            self.data = self.searchColumns()
         else:
             self.search()
-            self.raw = self.data.copy()
+            self.raw = self.data
             self.data = self.formatData()
         self.log.info('{} downloaded documents'.format(len(self.data)))
+        if self.compress:
+            self.log.info(self.client.compression())
 
     def __repr__(self):
         return '<{} dictionaries downloaded in data attribute>'.format(len(self.data))
 
+    @classmethod
+    def batch(cls,
+              queries: List[dict],
+              concurrency: Optional[int] = 4,
+              **kwargs: Any) -> List['Search']:
+        """Runs many searches concurrently sharing one client.
+
+        Each query is either a dictionary of `Search` arguments, such as {'index': 'iana', 'must': 'port:80'},
+        or a payload built by `makeQuery` (with 'index' and 'body'), read as described in `batchArguments`.
+        The wall-clock time is close to the slowest query instead of the sum of all of them.
+
+        Args:
+            queries: Arguments or payloads of each search
+            concurrency: Number of searches running at the same time
+            kwargs: Arguments shared by all searches, such as url or client
+
+        Returns:
+            The searches in the same order of queries, each with its own `data`, `total` and `took`
+
+        Examples:
+            >>> searches = avantpy.download.Search.batch([{'index': 'iana'}, {'index': 'kev'}], url='https://prod.avantdata.com.br')
+            >>> [(len(s.data), s.took) for s in searches]
+            [(56039, 412), (868, 12)]
+        """
+        if not kwargs.get('client'):
+            kwargs['client'] = Client(utils.get_url(kwargs.get('url', '')),
+                                      cluster=kwargs.get('cluster', 'AvantData'),
+                                      verify_SSL=kwargs.get('verify_SSL', False),
+                                      pool_maxsize=max(10, concurrency * max(kwargs.get('slices', 1), kwargs.get('windows', 1))),
+                                      compress=kwargs.get('compress', False))
+
+        def run(query):
+            return cls(**cls.batchArguments(query, kwargs))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            searches = list(executor.map(run, queries))
+        logging.getLogger(__name__).info('{} queries returned {} documents in {} ms'.format(
+            len(searches), sum(len(s.data) for s in searches), sum(s.took for s in searches)))
+        return searches
+
+    @classmethod
+    def batchArguments(cls, query: dict, kwargs: dict) -> dict:
+        """Returns the arguments of the search of a `batch` query.
+
+        A payload built by `makeQuery` is searched as is, read with the `size` and `aggs` of its body and
+        paged with a scroll only if it has a 'scroll', otherwise with `search_after`.
+
+        Args:
+            query: Arguments or payload of the search
+            kwargs: Arguments shared by all searches
+
+        Returns:
+            The arguments of the search
+        """
+        if 'body' not in query:
+            return {**kwargs, **query}
+        body = query['body']
+        arguments = {
+            'index': query.get('index', '*'),
+            **kwargs,
+            'size': body.get('size', 10),
+            'aggs': body.get('aggs', {}),
+            'pagination': 'scroll' if 'scroll' in query else 'search_after',
+            'query': query
+        }
+        if 'scroll' in query:
+            arguments['seed_time'] = query['scroll']
+        return arguments
+
     def makeQuery(self):
         """Returns the GET /_search object for searching in Elasticsearch."""
         searchQuery = {
@@ -160,6 +357,13 @@ class Search:
                 ]
             }
         }
+        if self.pagination == 'search_after':
+            searchQuery.pop('scroll')
+            searchQuery['body']['sort'].append({
+                self.tiebreaker: {
+                    'order': 'desc'
+                }
+            })
         if self.aggs:
             searchQuery['body']['size'] = 0
             searchQuery['body']['aggs'] = self.aggs
@@ -167,34 +371,8 @@ class Search:
 
     def search(self):
         """Searches for documents in Elasticsearch using the given query."""
-        self.log.info('Searching {} in {}'.format(self.index, self.url))
-        try:
-            self.response = requests.post(self.url+self.api_custom,
-                                          headers={'cluster': self.cluster},
-                                          data=json.dumps(self.query),
-                                          verify=self.verify_SSL)
-            if self.response.status_code < 400 and isinstance(self.response.json(), dict) and not self.aggs:
-                self.scrollID = self.response.json().get('_scroll_id')
-                self.total = self.response.json().get('hits').get('total')
-                self.log.info('Total of {} documents found'.format(self.total))
-                if type(self.response.json().get('took')) is int:
-                    self.took += self.response.json().get('took')
-                self.data.extend(self.response.json().get('hits').get('hits'))
-                if min(self.total, self.max_size) > self.size:
-                    self.scrollQuery = {
-                        'scroll': self.seed_time,
-                        'scroll_id': self.scrollID
-                    }
-                    self.log.info(
-                        'Over {} found. Starting scroll search'.format(self.size))
-                    self.scrollSearch()
-            elif self.aggs and isinstance(self.response.json(), dict):
-                if type(self.response.json().get('took')) is int:
-                    self.took += self.response.json().get('took')
-                self.data.append(self.response.json().get('aggregations'))
-        except Exception:
-            self.log.error('Failed to search {} in {}'.format(
-                self.index, self.url), exc_info=True)
+        for hits in self.pages():
+            self.data.extend(hits)
 
     def scrollSearch(self):
         """Make the scroll search loop.
@@ -205,35 +383,948 @@ class Search:
         Raises:
             Warning: If the search fails.
         """
-        self.log.info(
-            '{}/{} downloaded documents'.format(len(self.data), min(self.total, self.max_size)))
+        for hits in self.scrollPages(len(self.data)):
+            self.data.extend(hits)
+
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits page by page from `cache` or with the configured `pagination` and `slices`."""
+        self.failures = 0
+        pages = self.cachedPages() if self.cache else self.queryPages()
+        if self.aggs and not self.composite:
+            return pages
+        return self.trackedPages(pages)
+
+    def trackedPages(self, pages: Iterator[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the pages while counting them, reporting the `outcome` and updating `checkpoint` once all pages were consumed."""
+        progress = self.progress()
+        for hits in pages:
+            self.track(progress, hits)
+            yield hits
+        self.finish(progress)
+
+    def progress(self) -> Dict[str, Any]:
+        """Returns the progress of a download, counting the documents and the highest `sort` value tracked."""
+        return {'highest': self.mark, 'downloaded': 0}
+
+    def track(self, progress: Dict[str, Any], hits: List[Dict[str, Any]]):
+        """Adds a page to the progress of a download."""
+        if self.checkpointKey:
+            progress['highest'] = self.highestSort(hits, progress['highest'])
+        progress['downloaded'] += len(hits)
+
+    def finish(self, progress: Dict[str, Any]):
+        """Reports the `outcome` of a download consumed to the end and updates `checkpoint`."""
+        self.report(progress['downloaded'])
+        if self.checkpointKey:
+            self.saveCheckpoint(progress['highest'], progress['downloaded'])
+
+    def report(self, downloaded: int) -> dict:
+        """Sets and logs the `outcome` of a download.
+
+        The download is 'complete' if it is `complete`, 'failed' if nothing was downloaded because of
+        `failures`, and 'partial' otherwise.
+
+        Args:
+            downloaded: Number of documents downloaded
+
+        Returns:
+            The `outcome` attribute
+        """
+        expected = min(self.total, self.max_size)
+        if self.complete(downloaded):
+            status = 'complete'
+        elif self.failures and not downloaded:
+            status = 'failed'
+        else:
+            status = 'partial'
+        self.outcome = {
+            'status': status,
+            'downloaded': downloaded,
+            'total': self.total,
+            'retried': self.retried,
+            'resumed': self.resumed,
+            'failures': self.failures
+        }
+        message = 'Download of {} {}: {}/{} documents, {} retries, {} resumes, {} failures'.format(
+            self.index, status, downloaded, expected, self.retried, self.resumed, self.failures)
+        if status == 'complete':
+            self.log.info(message)
+        else:
+            self.log.warning(message)
+        return self.outcome
+
+    def complete(self, downloaded: int) -> bool:
+        """Returns whether a download is complete: without `failures` and, unless it is an aggregation,
+        with all documents found up to `max_size`.
+
+        Args:
+            downloaded: Number of documents, or buckets of a `composite` aggregation, downloaded
+        """
+        if self.failures:
+            return False
+        return bool(self.aggs) or downloaded >= min(self.total, self.max_size)
+
+    def sortValue(self, hit: Dict[str, Any]) -> Any:
+        """Returns the `sort` value of a hit."""
+        return (hit.get('sort') or [hit.get('_source', {}).get(self.sort)])[0]
+
+    def highestSort(self, hits: List[Dict[str, Any]], highest: Any = None) -> Any:
+        """Returns the highest `sort` value among the hits and highest."""
+        for hit in hits:
+            value = self.sortValue(hit)
+            if value is not None and (highest is None or value > highest):
+                highest = value
+        return highest
+
+    def lastSort(self,
+                 hits: List[Dict[str, Any]],
+                 last: Optional[Tuple[Any, set]] = None) -> Tuple[Any, set]:
+        """Returns the `sort` value of the last hit and the ids of the hits with that value.
+
+        Args:
+            hits: Page of hits in sort order
+            last: Value returned for the previous page
+
+        Returns:
+            The last `sort` value and the ids already downloaded with it
+        """
+        value, seen = last or (None, set())
+        for hit in hits:
+            hitValue = self.sortValue(hit)
+            if hitValue != value:
+                value, seen = hitValue, set()
+            seen.add(hit.get('_id'))
+        return value, seen
+
+    def resumeQuery(self, query: dict, last: Tuple[Any, set]) -> dict:
+        """Returns a copy of query restricted to the documents not downloaded before the last `sort` value.
+
+        Args:
+            query: Query whose scroll was lost
+            last: Value returned by `lastSort` for the downloaded pages
+
+        Returns:
+            The query with a range up to the last value added to the filter of its bool query
+        """
+        query = copy.deepcopy(query)
+        boolQuery = query['body']['query']['bool']
+        filters = boolQuery.get('filter', [])
+        if not isinstance(filters, list):
+            filters = [filters]
+        boolQuery['filter'] = filters + [{'range': {self.sort: {'lte': last[0]}}}]
+        return query
+
+    def unseen(self, hits: List[Dict[str, Any]], last: Tuple[Any, set]) -> List[Dict[str, Any]]:
+        """Returns the hits of a resumed scroll that were not downloaded before it was lost."""
+        value, seen = last
+        return [hit for hit in hits if self.sortValue(hit) != value or hit.get('_id') not in seen]
+
+    def wait(self, attempt: int, error: Any):
+        """Sleeps the `backoff` of an attempt before retrying a failed request."""
+        delay = utils.backoff(attempt, self.backoff)
+        self.log.warning('{}. Retrying in {:.1f} seconds ({}/{})'.format(
+            error, delay, attempt + 1, self.retries))
+        with self.lock:
+            self.retried += 1
+        time.sleep(delay)
+
+    def saveCheckpoint(self, highest: Any, downloaded: int):
+        """Stores highest in `checkpoint` if all documents found were downloaded without `failures`.
+
+        Interrupted or truncated downloads are not stored, otherwise the older documents that were
+        missed would never be downloaded by later runs. The `total` of sliced or windowed downloads
+        only counts the slices or windows that answered, so any failure also prevents the update.
+        """
+        if self.failures:
+            self.log.warning('Checkpoint of {} not updated: {} failures'.format(self.index, self.failures))
+        elif downloaded < self.total:
+            self.log.warning('Checkpoint of {} not updated: {}/{} documents downloaded'.format(
+                self.index, downloaded, self.total))
+        elif highest is not None and highest != self.mark:
+            self.checkpoint.set(self.checkpointKey, highest)
+            self.log.info('Checkpoint of {} set to {}'.format(self.index, highest))
+
+    def cachedPages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits page by page from `cache`, downloading them if there is no fresh entry.
+
+        The downloaded pages are only stored if the download is `complete`.
+        """
+        key = self.cache.key(self.url, self.cluster, self.query, self.max_size)
+        cached = self.cache.read(key)
+        if cached:
+            meta, pages = cached
+            self.total = meta.get('total', 0)
+            return pages
+        return self.cache.write(key, self.queryPages(),
+                                self.cache.expiration(self.query),
+                                complete=self.complete,
+                                total=lambda: self.total)
+
+    def queryPages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits page by page with the configured `windows`, `pagination` and `slices`."""
+        if self.composite:
+            return self.compositePages()
+        if self.aggs:
+            return self.searchPages()
+        if self.windows > 1:
+            return self.windowPages()
+        if self.pagination == 'search_after':
+            return self.searchAfterPages()
+        if self.slices > 1:
+            return self.slicedPages()
+        return self.searchPages()
+
+    def request(self, api: str, payload: dict, retry: Optional[bool] = True) -> Any:
+        """Posts the payload to an endpoint of the api and returns the parsed response.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried up to `retries` times
+        with exponential `backoff` and jitter.
+
+        Args:
+            api: Endpoint to be joined to the url
+            payload: Object to be sent as JSON in the request body
+            retry: Retry transient errors. Scroll requests are not retried, as the scroll may have advanced
+
+        Returns:
+            The parsed JSON response
+
+        Raises:
+            requests.HTTPError: If the response status code is 400 or over
+        """
+        attempt = 0
+        while True:
+            try:
+                self.response = self.client.post(api, data=codec.dumps(payload))
+                self.response.raise_for_status()
+                return codec.loads(self.response.content)
+            except requests.RequestException as e:
+                status = getattr(e.response, 'status_code', None)
+                transient = utils.retryable(status) or (
+                    status is None and isinstance(e, (requests.ConnectionError, requests.Timeout)))
+                if not retry or not transient or attempt >= self.retries:
+                    raise
+                self.wait(attempt, e)
+                attempt += 1
+
+    def sliceQuery(self, sliceID: int) -> dict:
+        """Returns a copy of the query restricted to one slice of a sliced scroll.
+
+        Args:
+            sliceID: Id of the slice, from 0 to `slices` - 1
+
+        Returns:
+            The query with the `slice` parameter set in its body
+        """
+        query = copy.deepcopy(self.query)
+        query['body']['slice'] = {
+            'id': sliceID,
+            'max': self.slices
+        }
+        return query
+
+    def drive(self, pager: Generator[tuple, Any, None]) -> Iterator[List[Dict[str, Any]]]:
+        """Runs the steps of a pager with blocking requests and yields its pages.
+
+        Pagers, such as `searchPager`, hold the state of a pagination from page to page without doing
+        any I/O. They yield ('request', api, payload, retry), answered with the parsed response of `request`
+        or with the exception it raised, ('wait', attempt, error), answered by sleeping with `wait`, and
+        ('page', hits). `AsyncSearch` runs the same pagers awaiting its requests.
+
+        Args:
+            pager: Steps of a pagination
+
+        Yields:
+            The hits of each page
+        """
         try:
-            self.response = requests.post(self.url+self.api_scroll,
-                                          headers={'cluster': self.cluster},
-                                          data=json.dumps(self.scrollQuery),
-                                          verify=self.verify_SSL)
-            if self.response.status_code < 400:
-                if type(self.response.json().get('took')) is int:
-                    self.took += self.response.json().get('took')
-                self.data.extend(self.response.json().get('hits').get('hits'))
-                if min(self.total, self.max_size) > len(self.data):
-                    self.scrollSearch()
-        except Exception as e:
-            self.log.warning('Failed to scroll search {} in {}'.format(
-                self.index, self.url))
-            self.log.error(e)
-
-    def formatData(self) -> List[Dict[str, Any]]:
+            step = next(pager)
+            while True:
+                if step[0] == 'page':
+                    yield step[1]
+                    step = next(pager)
+                elif step[0] == 'wait':
+                    self.wait(*step[1:])
+                    step = next(pager)
+                else:
+                    try:
+                        responseJson = self.request(*step[1:])
+                    except Exception as e:
+                        step = pager.throw(e)
+                    else:
+                        step = pager.send(responseJson)
+        except StopIteration:
+            return
+        finally:
+            pager.close()
+
+    def searchPages(self,
+                    sliceID: Optional[int] = None,
+                    query: Optional[dict] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of the query page by page.
+
+        Sends the query to the custom search endpoint and, if more documents than `size` were found,
+        continues with the scroll search loop. Only one page is held at a time.
+
+        Args:
+            sliceID: Search only the given slice of a sliced scroll
+            query: Search a part of the query, such as a `windowQuery`, adding its total to `total`
+
+        Yields:
+            List of raw elasticsearch hits, or a list with the aggregations if `aggs` is set.
+        """
+        return self.drive(self.searchPager(sliceID, query))
+
+    def searchPager(self,
+                    sliceID: Optional[int] = None,
+                    query: Optional[dict] = None) -> Generator[tuple, Any, None]:
+        """Steps of `searchPages`. See `drive`"""
+        maxSize = self.max_size
+        if sliceID is not None:
+            query = self.sliceQuery(sliceID)
+            maxSize = -(-self.max_size // self.slices)
+            self.log.info('Searching slice {}/{} of {} in {}'.format(
+                sliceID + 1, self.slices, self.index, self.url))
+        elif query is None:
+            query = self.query
+            self.log.info('Searching {} in {}'.format(self.index, self.url))
+        try:
+            responseJson = yield ('request', self.api_custom, query, True)
+        except Exception:
+            self.log.error('Failed to search {} in {}'.format(
+                self.index, self.url), exc_info=True)
+            self.addFailure()
+            return
+        if not isinstance(responseJson, dict):
+            self.log.error('Failed to search {} in {}'.format(self.index, self.url))
+            self.addFailure()
+            return
+        self.addTook(responseJson)
+        if self.aggs:
+            yield ('page', [responseJson.get('aggregations')])
+            return
+        scrollID = responseJson.get('_scroll_id')
+        total = responseJson.get('hits').get('total')
+        self.log.info('Total of {} documents found'.format(total))
+        if query is self.query:
+            self.scrollID = scrollID
+            self.total = total
+        else:
+            with self.lock:
+                self.total += total
+        hits = responseJson.get('hits').get('hits')
+        yield ('page', hits)
+        if min(total, maxSize) > self.size:
+            self.log.info(
+                'Over {} found. Starting scroll search'.format(self.size))
+            yield from self.scrollPager(len(hits), scrollID, min(total, maxSize), query, hits)
+
+    def scrollPages(self,
+                    downloaded: Optional[int] = 0,
+                    scrollID: Optional[str] = None,
+                    limit: Optional[int] = None,
+                    query: Optional[dict] = None,
+                    previous: Optional[List[Dict[str, Any]]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of the scroll search page by page.
+
+        Loops over the scroll endpoint until `limit` documents were retrieved
+        or an empty page is returned. If a scroll request fails, for instance because its context
+        expired, the query is searched again from the last `sort` value downloaded, skipping the
+        hits already downloaded with that value, up to `retries` consecutive times.
+
+        Args:
+            downloaded: Number of documents already retrieved by the custom search
+            scrollID: Scroll context to be consumed. Defaults to the `scrollID` attribute
+            limit: Number of documents to retrieve. Defaults to the minimum between `total` and `max_size`
+            query: Query that opened the scroll, searched again to resume it. Defaults to the `query` attribute
+            previous: Hits already retrieved by the custom search
+
+        Yields:
+            List of raw elasticsearch hits of each scroll page
+        """
+        return self.drive(self.scrollPager(downloaded, scrollID, limit, query, previous))
+
+    def scrollPager(self,
+                    downloaded: Optional[int] = 0,
+                    scrollID: Optional[str] = None,
+                    limit: Optional[int] = None,
+                    query: Optional[dict] = None,
+                    previous: Optional[List[Dict[str, Any]]] = None) -> Generator[tuple, Any, None]:
+        """Steps of `scrollPages`. See `drive`"""
+        if limit is None:
+            limit = min(self.total, self.max_size)
+        query = self.query if query is None else query
+        last = self.lastSort(previous or [])
+        failures = 0
+        resumed = False
+        scrollQuery = {
+            'scroll': self.seed_time,
+            'scroll_id': scrollID or self.scrollID
+        }
+        while limit > downloaded:
+            self.log.info(
+                '{}/{} downloaded documents'.format(downloaded, limit))
+            try:
+                if failures:
+                    responseJson = yield ('request', self.api_custom, self.resumeQuery(query, last), True)
+                    with self.lock:
+                        self.resumed += 1
+                    failures = 0
+                    resumed = True
+                else:
+                    responseJson = yield ('request', self.api_scroll, scrollQuery, False)
+                page = responseJson.get('hits').get('hits')
+            except Exception as e:
+                if last[0] is None or failures >= self.retries:
+                    self.log.warning('Failed to scroll search {} in {}'.format(
+                        self.index, self.url))
+                    self.log.error(e)
+                    self.addFailure()
+                    return
+                self.log.warning('Scroll search of {} failed after {} documents. Resuming from {} {}'.format(
+                    self.index, downloaded, self.sort, last[0]))
+                yield ('wait', failures, e)
+                failures += 1
+                continue
+            self.addTook(responseJson)
+            if responseJson.get('_scroll_id'):
+                scrollQuery['scroll_id'] = responseJson.get('_scroll_id')
+            if not page:
+                return
+            hits = self.unseen(page, last) if resumed else page
+            if hits:
+                last = self.lastSort(hits, last)
+                downloaded += len(hits)
+                yield ('page', hits)
+
+    def searchAfterPages(self, query: Optional[dict] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of the query page by page using `search_after`.
+
+        Each page is a new custom search starting after the sort values of the last hit of the
+        previous page, so no scroll context is kept open in the cluster.
+
+        Args:
+            query: Search a part of the query, such as a `windowQuery`, adding its total to `total`
+
+        Yields:
+            List of raw elasticsearch hits of each page
+        """
+        return self.drive(self.searchAfterPager(query))
+
+    def searchAfterPager(self, query: Optional[dict] = None) -> Generator[tuple, Any, None]:
+        """Steps of `searchAfterPages`. See `drive`"""
+        partial = query is not None
+        query = copy.deepcopy(self.query if query is None else query)
+        query.pop('scroll', None)
+        size = query['body'].get('size', self.size)
+        downloaded = 0
+        limit = None
+        self.log.info('Searching {} in {}'.format(self.index, self.url))
+        while limit is None or limit > downloaded:
+            try:
+                responseJson = yield ('request', self.api_custom, query, True)
+                hits = responseJson.get('hits').get('hits')
+            except Exception:
+                self.log.error('Failed to search {} in {} after {} documents'.format(
+                    self.index, self.url, downloaded), exc_info=True)
+                self.addFailure()
+                return
+            self.addTook(responseJson)
+            if limit is None:
+                total = responseJson.get('hits').get('total')
+                limit = min(total, self.max_size)
+                self.log.info('Total of {} documents found'.format(total))
+                with self.lock:
+                    self.total = self.total + total if partial else total
+            if not hits:
+                return
+            downloaded += len(hits)
+            yield ('page', hits)
+            if len(hits) < size:
+                return
+            query['body']['search_after'] = hits[-1].get('sort')
+            self.log.info(
+                '{}/{} downloaded documents'.format(downloaded, limit))
+
+    def slicedPages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of all slices as soon as any of them arrives.
+
+        Opens `slices` sliced scrolls and drains them concurrently with a thread pool. At most
+        `slices` * 2 pages are kept waiting to be consumed.
+
+        Yields:
+            List of raw elasticsearch hits of each page of any slice
+        """
+        self.total = 0
+        return self.concurrentPages([lambda sliceID=sliceID: self.searchPages(sliceID)
+                                     for sliceID in range(self.slices)])
+
+    def windowPages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the raw hits of `windows` time windows of the `sort` field in sort order.
+
+        The windows are downloaded concurrently, each one with the configured `pagination`. The pages
+        of each window are yielded after all pages of the previous window, with at most two pages of
+        each window waiting to be consumed. If the windows cannot be computed, the error is logged
+        and counted in `failures`.
+
+        Yields:
+            List of raw elasticsearch hits of each page, in sort order
+        """
+        try:
+            ranges = self.windowRanges()
+        except Exception:
+            self.log.error('Failed to split {} in windows of {}'.format(
+                self.index, self.sort), exc_info=True)
+            self.addFailure()
+            return
+        self.total = 0
+        downloaded = 0
+
+        def window(gte, lt):
+            query = self.windowQuery(gte, lt)
+            if self.pagination == 'search_after':
+                return self.searchAfterPages(query)
+            return self.searchPages(query=query)
+        for hits in self.concurrentPages([lambda gte=gte, lt=lt: window(gte, lt) for gte, lt in ranges],
+                                         ordered=True):
+            hits = hits[:self.max_size-downloaded]
+            downloaded += len(hits)
+            yield hits
+            if downloaded >= self.max_size:
+                return
+
+    def windowRanges(self) -> List[Tuple[int, int]]:
+        """Splits the values of the `sort` field matching the query in `windows` ranges.
+
+        With `window_mode` 'even' the ranges have the same length. With 'adaptive' a range aggregation
+        counts the documents of `windows` * 8 even ranges, which are merged into ranges with about the
+        same number of documents.
+
+        Returns:
+            List of (gte, lt) bounds of each window, in the order of the sort
+        """
+        bounds = self.aggregate({'bounds': {'stats': {'field': self.sort}}}).get('bounds') or {}
+        if not bounds.get('count'):
+            return []
+        low, high = int(bounds.get('min')), int(bounds.get('max')) + 1
+        if self.window_mode == 'adaptive':
+            step = max(1, -(-(high-low) // (self.windows*8)))
+            edges = list(range(low, high, step)) + [high]
+            buckets = self.aggregate({'windows': {'range': {
+                'field': self.sort,
+                'ranges': [{'from': gte, 'to': lt} for gte, lt in zip(edges, edges[1:])]
+            }}}).get('windows').get('buckets')
+            target = sum(bucket.get('doc_count') for bucket in buckets) / self.windows
+            windowEdges = [low]
+            count = 0
+            for edge, bucket in zip(edges[1:-1], buckets):
+                count += bucket.get('doc_count')
+                if count >= target and len(windowEdges) < self.windows:
+                    windowEdges.append(edge)
+                    count = 0
+            edges = windowEdges + [high]
+        else:
+            step = max(1, -(-(high-low) // self.windows))
+            edges = list(range(low, high, step)) + [high]
+        ranges = list(zip(edges, edges[1:]))
+        self.log.info('Searching {} in {} windows of {}'.format(self.index, len(ranges), self.sort))
+        return ranges[::-1]
+
+    def windowQuery(self, gte: int, lt: int) -> dict:
+        """Returns a copy of the query restricted to a range of the `sort` field.
+
+        Args:
+            gte: Lower bound of the window, included
+            lt: Upper bound of the window, excluded
+
+        Returns:
+            The query with the range added to the filter of its bool query
+        """
+        return self.filteredQuery({'range': {self.sort: {'gte': gte, 'lt': lt}}})
+
+    def filteredQuery(self, filter: dict) -> dict:
+        """Returns a copy of the query with a filter added to its bool query."""
+        query = copy.deepcopy(self.query)
+        boolQuery = query['body']['query']['bool']
+        filters = boolQuery.get('filter', [])
+        if not isinstance(filters, list):
+            filters = [filters]
+        boolQuery['filter'] = filters + [filter]
+        return query
+
+    def aggregate(self, aggs: dict) -> dict:
+        """Runs aggregations over the documents matching the query without downloading them.
+
+        Args:
+            aggs: Elasticsearch aggregations
+
+        Returns:
+            The aggregations of the response
+        """
+        return self.aggregations(self.request(self.api_custom, self.countQuery(aggs)))
+
+    def aggregations(self, responseJson: dict) -> dict:
+        """Reads the response of a `countQuery`, setting `total`, and returns its aggregations."""
+        self.addTook(responseJson)
+        self.total = responseJson.get('hits').get('total')
+        return responseJson.get('aggregations') or {}
+
+    def compositePages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the buckets of the `composite` aggregation page by page.
+
+        Each page is a new request with size 0 starting after the `after_key` of the previous page,
+        so neither side holds more than one page of buckets, no matter the number of distinct keys.
+        The page size is the `size` of the composite aggregation.
+
+        Yields:
+            List of raw buckets of each page
+
+        Examples:
+            >>> aggs = {'hosts': {'composite': {'size': 1000, 'sources': [{'ip': {'terms': {'field': 'ip'}}}]},
+            ...                   'aggs': {'ports': {'cardinality': {'field': 'port'}}}}}
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='avantscan_results', aggs=aggs, flatten=True, lazy=True)
+            >>> next(s.iter_docs())
+            {'ip': '10.0.0.1', 'doc_count': 12, 'ports': 3}
+        """
+        return self.drive(self.compositePager())
+
+    def compositePager(self) -> Generator[tuple, Any, None]:
+        """Steps of `compositePages`. See `drive`"""
+        query = self.countQuery()
+        composite = query['body']['aggs'][self.composite]['composite']
+        size = composite.get('size', 10)
+        downloaded = 0
+        self.log.info('Searching composite aggregation {} of {} in {}'.format(
+            self.composite, self.index, self.url))
+        while True:
+            try:
+                responseJson = yield ('request', self.api_custom, query, True)
+            except Exception:
+                self.log.error('Failed to search composite aggregation {} of {} after {} buckets'.format(
+                    self.composite, self.index, downloaded), exc_info=True)
+                self.addFailure()
+                return
+            aggregation = self.aggregations(responseJson).get(self.composite) or {}
+            buckets = aggregation.get('buckets') or []
+            if not buckets:
+                return
+            downloaded += len(buckets)
+            yield ('page', buckets)
+            if len(buckets) < size:
+                return
+            composite['after'] = aggregation.get('after_key') or buckets[-1].get('key')
+            self.log.info('{} downloaded buckets'.format(downloaded))
+
+    def flattenBucket(self, bucket: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns a bucket of a composite aggregation as a row.
+
+        Args:
+            bucket: Raw bucket with 'key', 'doc_count' and sub-aggregations
+
+        Returns:
+            Dictionary with the fields of the key, 'doc_count', the 'value' of single value metrics by
+            their names and the fields of multi value metrics, such as stats, as 'name.field'
+        """
+        row = dict(bucket.get('key') or {})
+        row['doc_count'] = bucket.get('doc_count')
+        for name, value in bucket.items():
+            if name in ('key', 'doc_count') or not isinstance(value, dict):
+                continue
+            if 'value' in value:
+                row[name] = value.get('value')
+                continue
+            for field, fieldValue in (value.get('values') or value).items():
+                if not isinstance(fieldValue, (dict, list)):
+                    row['{}.{}'.format(name, field)] = fieldValue
+        return row
+
+    def countQuery(self, aggs: Optional[dict] = None) -> dict:
+        """Returns a copy of the query that returns no hits and opens no scroll, only counting the documents.
+
+        Args:
+            aggs: Elasticsearch aggregations to be added to the query
+
+        Returns:
+            The query with size 0 and without scroll and sort
+        """
+        query = copy.deepcopy(self.query)
+        query.pop('scroll', None)
+        query['body'].pop('sort', None)
+        query['body']['size'] = 0
+        if aggs:
+            query['body']['aggs'] = aggs
+        return query
+
+    def count(self) -> int:
+        """Counts the documents matching the query without downloading them.
+
+        Returns:
+            The `total` attribute
+
+        Examples:
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='avantscan_results', lazy=True)
+            >>> s.count()
+            44639
+        """
+        self.aggregations(self.request(self.api_custom, self.countQuery()))
+        self.log.info('Total of {} documents found'.format(self.total))
+        return self.total
+
+    def histogram(self, interval: Optional[str] = None, size: Optional[int] = 1000) -> Dict[str, int]:
+        """Counts the documents matching the query by index or by time bucket without downloading them.
+
+        Useful to choose `slices`, `windows` or `max_size` before a large download.
+
+        Args:
+            interval: Interval of the `sort` field buckets, such as '1d' or '1h'. If None, counts by index
+            size: Maximum number of indices
+
+        Returns:
+            The number of documents of each index or bucket, in bucket order
+
+        Examples:
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='avantscan*', lazy=True)
+            >>> s.histogram()
+            {'avantscan_results': 44639, 'avantscan_hosts': 1021}
+            >>> s.histogram('1d')
+            {'2022-11-15T00:00:00.000Z': 20117, '2022-11-16T00:00:00.000Z': 25543}
+        """
+        return self.histogramBuckets(self.aggregate(self.histogramAggs(interval, size)))
+
+    def histogramAggs(self, interval: Optional[str] = None, size: Optional[int] = 1000) -> dict:
+        """Returns the aggregation used by `histogram`."""
+        if interval is None:
+            return {'histogram': {'terms': {'field': '_index', 'size': size}}}
+        return {'histogram': {'date_histogram': {'field': self.sort,
+                                                 'interval': interval,
+                                                 'min_doc_count': 1}}}
+
+    def histogramBuckets(self, aggregations: dict) -> Dict[str, int]:
+        """Returns the document count of each bucket of the aggregation used by `histogram`."""
+        buckets = aggregations.get('histogram', {}).get('buckets', [])
+        return {bucket.get('key_as_string', bucket.get('key')): bucket.get('doc_count') for bucket in buckets}
+
+    def concurrentPages(self,
+                        sources: List[Callable[[], Iterator[List[Dict[str, Any]]]]],
+                        ordered: Optional[bool] = False) -> Iterator[List[Dict[str, Any]]]:
+        """Drains page iterators concurrently with a thread pool.
+
+        Args:
+            sources: Callables returning each page iterator
+            ordered: Yields all pages of each source before the next one, instead of as soon as they arrive
+
+        Yields:
+            The pages of all sources
+        """
+        if ordered:
+            queues = [queue.Queue(maxsize=2) for _ in sources]
+        else:
+            queues = [queue.Queue(maxsize=len(sources)*2)] * len(sources)
+        stop = threading.Event()
+        done = object()
+
+        def drain(i):
+            try:
+                for hits in sources[i]():
+                    while not stop.is_set():
+                        try:
+                            queues[i].put(hits, timeout=1)
+                            break
+                        except queue.Full:
+                            pass
+                    if stop.is_set():
+                        return
+            except Exception:
+                self.log.error('Failed to search {} in {}'.format(
+                    self.index, self.url), exc_info=True)
+                self.addFailure()
+            finally:
+                queues[i].put(done)
+
+        pending = list(range(len(sources)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(sources))) as executor:
+            for i in pending:
+                executor.submit(drain, i)
+            try:
+                while pending:
+                    hits = queues[pending[0]].get()
+                    if hits is done:
+                        pending.pop(0)
+                    else:
+                        yield hits
+            finally:
+                stop.set()
+                while pending:
+                    if queues[pending[0]].get() is done:
+                        pending.pop(0)
+
+    def addFailure(self):
+        """Counts a failed request, slice or window in `failures`, so the download is not complete."""
+        with self.lock:
+            self.failures += 1
+
+    def addTook(self, responseJson: dict):
+        """Adds the time elasticsearch took to answer a request to the `took` attribute.
+
+        Args:
+            responseJson: Parsed response of the search or scroll request
+        """
+        if type(responseJson.get('took')) is int:
+            with self.lock:
+                self.took += responseJson.get('took')
+
+    def iter_pages(self, raw: Optional[bool] = False) -> Iterator[List[Any]]:
+        """Yields the downloaded documents page by page without accumulating them in `data`.
+
+        Memory stays bounded by one page no matter how many documents are in the index.
+
+        Args:
+            raw: Yields the elasticsearch hits as returned by the api instead of formatted dictionaries
+
+        Yields:
+            List of documents of each page
+
+        Examples:
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='avantscan_results', lazy=True)
+            >>> for page in s.iter_pages():
+            ...     print(len(page))
+            5000
+            5000
+        """
+        if self.memory:
+            self.memory_search()
+            yield self.data
+            return
+        for hits in self.pages():
+            yield hits if raw else self.formatData(hits)
+
+    def iter_docs(self) -> Iterator[Any]:
+        """Yields the formatted documents one by one, downloading a page at a time.
+
+        Yields:
+            Each document as a dictionary
+        """
+        for page in self.iter_pages():
+            yield from page
+
+    def export(self,
+               path: str,
+               format: Optional[str] = 'ndjson',
+               compress: Optional[str] = None,
+               fieldnames: Optional[List[str]] = None) -> Dict[str, int]:
+        """Writes the documents to a file page by page, as soon as each page arrives.
+
+        Only one page is held in memory, so the size of the export is limited by the disk only.
+        The CSV columns are fieldnames, or 'id', 'type', 'index' and the `includes` fields, or the fields
+        of the first page. As the header is written before the next pages arrive, fields missing from the
+        columns are dropped and logged: pass fieldnames to export them.
+
+        Args:
+            path: Path of the file to be written
+            format: 'ndjson' to write one JSON document per line or 'csv'
+            compress: 'gzip' to compress the file
+            fieldnames: Columns of the CSV file
+
+        Returns:
+            Dictionary with the number of 'documents' and 'bytes' written
+
+        Raises:
+            ValueError: If format or compress are not supported
+
+        Examples:
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', lazy=True)
+            >>> s.export('iana.ndjson.gz', compress='gzip')
+            INFO:avantpy.download.Search:56039 documents exported to iana.ndjson.gz with 2MB
+            {'documents': 56039, 'bytes': 2456221}
+        """
+        if format not in ('ndjson', 'csv'):
+            raise ValueError('Format must be ndjson or csv')
+        if compress not in (None, 'gzip'):
+            raise ValueError('Compress must be None or gzip')
+        opener = gzip.open if compress == 'gzip' else open
+        documents = 0
+        if format == 'ndjson':
+            with opener(path, 'wb') as f:
+                for page in self.iter_pages():
+                    f.write(b''.join(codec.dumps(d) + b'\n' for d in page))
+                    documents += len(page)
+        else:
+            with opener(path, 'wt', encoding='utf-8', newline='') as f:
+                writer = None
+                dropped = set()
+                for page in self.iter_pages():
+                    if writer is None:
+                        if fieldnames is None:
+                            fieldnames = list(dict.fromkeys(k for d in page for k in d))
+                            if self.includes and not self.aggs:
+                                fieldnames = ['id', 'type', 'index', *self.includes]
+                        writer = csv.DictWriter(f, fieldnames, extrasaction='ignore')
+                        writer.writeheader()
+                    dropped.update(k for d in page for k in d if k not in writer.fieldnames)
+                    writer.writerows({k: codec.dumps(v).decode('utf-8') if isinstance(v, (dict, list)) else v
+                                      for k, v in d.items()} for d in page)
+                    documents += len(page)
+                if dropped:
+                    self.log.warning('Fields not in the columns of {} were dropped: {}'.format(
+                        path, sorted(dropped)))
+        size = os.path.getsize(path)
+        self.log.info('{} documents exported to {} with {}'.format(
+            documents, path, utils.human_size(size)))
+        return {'documents': documents, 'bytes': size}
+
+    def searchColumns(self) -> Columns:
+        """Downloads the documents page by page straight into column buffers.
+
+        Returns:
+            The `Columns` with a buffer for each field, with the `dates` fields as dates
+        """
+        columns = Columns(dates=self.dates)
+        for page in self.iter_pages():
+            columns.extend(page)
+        return columns
+
+    def to_columns(self) -> Columns:
+        """Returns the downloaded documents as `Columns`, building them from `data` if needed"""
+        if isinstance(self.data, Columns):
+            return self.data
+        columns = Columns(dates=self.dates)
+        columns.extend(self.data)
+        return columns
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Returns the downloaded documents as a dictionary of NumPy arrays. See `Columns.to_numpy`"""
+        return self.to_columns().to_numpy()
+
+    def to_pandas(self) -> Any:
+        """Returns the downloaded documents as a pandas DataFrame. See `Columns.to_pandas`
+
+        Examples:
+            >>> s = avantpy.download.Search('https://prod.avantdata.com.br', index='IANA', output='columns')
+            >>> s.to_pandas()['GenerateTime'].max()
+            Timestamp('2022-11-16 13:47:25')
+        """
+        return self.to_columns().to_pandas()
+
+    def formatData(self, data: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Transforms elasticsearch return data to a list of dictionaries
 
+        Args:
+            data: Raw hits to be formatted. Defaults to the `data` attribute
+
         Returns:
             List of dictionaries containing fields 'id', 'type', 'index' and any fields present in the '_source' field of each hit.
+            If `views` is set, the dictionaries are `Hit` views sharing the storage of the raw hits.
         """
+        if data is None:
+            data = self.data
         newData = []
-        if self.aggs:
-            newData = self.data
+        if self.composite and (self.flatten or self.output == 'columns'):
+            newData = [self.flattenBucket(bucket) for bucket in data]
+        elif self.aggs:
+            newData = data
+        elif self.views:
+            newData = [Hit(d) for d in data]
         else:
-            for d in self.data:
+            for d in data:
                 newData.append({
                     'id': d['_id'],
                     'type': d['_type'],
@@ -242,24 +1333,82 @@ class Search:
                 })
         return newData
 
-    def memory_search(self) -> List[Any]:
-        """Searches for the stored data in memory by the given key."""
+    def memory_search(self) -> Optional[List[Any]]:
+        """Searches for the stored data in memory by the given key.
+
+        Values split in chunks by `upload.Memory` are downloaded concurrently and joined.
+        Values in `memory_cache` are read without requesting the api.
+
+        Returns:
+            The `data` attribute, or None if the search failed
+        """
+        text = self.memory_cache.get(self.url, self.key) if self.memory_cache else None
+        if text is not None:
+            return self.readValue(text)
+        text = self.memoryRequest(self.key)
+        count = codec.chunks(text)
+        parts = None
+        if count:
+            keys = codec.chunk_keys(self.key, count)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, count)) as executor:
+                parts = list(executor.map(self.memoryRequest, keys))
+        return self.memoryValue(text, parts)
+
+    def memoryValue(self, text: Optional[str], parts: Optional[List[Optional[str]]] = None) -> Optional[List[Any]]:
+        """Reads a value downloaded by `memory_search`, storing it in `memory_cache`.
+
+        Args:
+            text: String stored by the key, or None if its search failed
+            parts: Strings stored by the keys of its chunks, if the value was split in chunks
+
+        Returns:
+            The `data` attribute, or None if the search failed
+        """
+        if parts is not None:
+            if any(part is None for part in parts):
+                self.log.error('Error searching chunks of {} in memory.'.format(self.key))
+                return None
+            text = ''.join(parts)
+        if text is None:
+            return None
+        if self.memory_cache:
+            self.memory_cache.set(self.url, self.key, text)
+        return self.readValue(text)
+
+    def memoryRequest(self, key: str) -> Optional[str]:
+        """Returns the string stored in memory by a key, or None if the search failed."""
         payload = {
-            'key': self.key
+            'key': key
         }
         try:
-            response = requests.post(self.url+self.api_memory, data=json.dumps(payload), verify=self.verify_SSL)
+            response = self.client.post(self.api_memory, data=codec.dumps(payload))
             self.log.debug(response.text)
             if response.ok:
-                value = eval(response.json())
-                if isinstance(value, list):
-                    self.data.extend(value)
-                elif isinstance(value, str):
-                    self.data.append(value)
-            else:
-                self.log.warning('Response error. Status code: {}'.format(response.status_code))
+                return codec.loads(response.content)
+            self.log.warning('Response error. Status code: {}'.format(response.status_code))
         except Exception:
             self.log.error('Error searching in memory.')
+        return None
+
+    def readValue(self, text: str) -> Optional[List[Any]]:
+        """Adds the value of a string stored in memory to the `data` attribute.
+
+        Args:
+            text: String stored by `upload.Memory`, parsed by `codec.unpack`
+
+        Returns:
+            The `data` attribute, or None if the string could not be parsed
+        """
+        try:
+            value = codec.unpack(text)
+        except Exception:
+            self.log.error('Error reading {} from memory.'.format(self.key), exc_info=True)
+            return None
+        if isinstance(value, list):
+            self.data.extend(value)
+        elif isinstance(value, str):
+            self.data.append(value)
+        return self.data
 
     def get_url(self, url: str) -> str:
         """This function returns a URL string.
@@ -276,10 +1425,4 @@ class Search:
         Returns:
             str: The URL to use for API requests.
         """
-        if not url:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            host_ip = s.getsockname()[0]
-            s.close()
-            return 'https://{}'.format(host_ip)
-        return url
\ No newline at end of file
+        return utils.get_url(url)
@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
 
+from ..download.Cache import *
+from ..download.Checkpoint import *
 from ..download.CSV import *
+from ..download.Columns import *
+from ..download.Hit import *
 from ..download.JSON import *
-from ..download.Search import *
\ No newline at end of file
+from ..download.MemoryCache import *
+from ..download.Search import *
+from ..download.AsyncSearch import *
\ No newline at end of file
@@ -0,0 +1,105 @@
+from ..AsyncClient import AsyncClient
+from ..download.AsyncSearch import AsyncSearch
+from .. import codec
+from .. import utils
+from .Memory import Memory
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class AsyncMemory(Memory):
+    """Async Memory Storage Uploader
+
+    A class to manage storage of data in memory inside an asyncio event loop
+
+    Args:
+        key (str): The unique identifier for the data to be stored
+        value (Any): The data to be stored in memory
+        baseurl (str, optional): Base URL to execute the memory storage request
+        client (AsyncClient, optional): Shared async client whose url and SSL settings replace baseurl and verify_SSL
+        **kwargs (any): Arguments of `Memory`
+
+    Attributes:
+        client (AsyncClient): Async client holding the pooled connections used by the requests
+        See `Memory`
+
+    Example:
+        >>> import asyncio
+        >>> memory = AsyncMemory(key="example_key", value={"example": "data"})
+        >>> asyncio.run(memory.upload())
+        INFO:avantpy.upload.Memory:Memory store response status for example_key indexing: 200
+    """
+
+    def __init__(self,
+                 key: str,
+                 value: Any,
+                 baseurl: Optional[str] = '',
+                 client: Optional[AsyncClient] = None,
+                 **kwargs: Any):
+        client = client or AsyncClient(baseurl, verify_SSL=kwargs.get('verify_SSL', False))
+        super().__init__(key, value, client=client, **kwargs)
+
+    @classmethod
+    async def set_many(cls,
+                       values: Dict[str, Any],
+                       concurrency: Optional[int] = 8,
+                       **kwargs: Any) -> Dict[str, Optional[int]]:
+        """Stores many keys concurrently in the event loop sharing one client. See `Memory.set_many`"""
+        if not kwargs.get('client'):
+            kwargs['client'] = AsyncClient(utils.get_url(kwargs.pop('baseurl', '')),
+                                           verify_SSL=kwargs.pop('verify_SSL', False))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(key):
+            async with semaphore:
+                return await cls(key, values[key], **kwargs).upload()
+        statuses = dict(zip(values, await asyncio.gather(*(run(key) for key in values))))
+        logging.getLogger(__name__).info('{}/{} keys stored in memory'.format(
+            sum(1 for status in statuses.values() if status is not None and status < 400), len(statuses)))
+        return statuses
+
+    @classmethod
+    async def get_many(cls,
+                       keys: Iterable[str],
+                       concurrency: Optional[int] = 8,
+                       **kwargs: Any) -> Dict[str, Optional[List[Any]]]:
+        """Reads many keys concurrently in the event loop sharing one client. See `Memory.get_many`"""
+        keys = list(keys)
+        if not kwargs.get('client'):
+            kwargs['client'] = AsyncClient(utils.get_url(kwargs.pop('url', kwargs.pop('baseurl', ''))),
+                                           verify_SSL=kwargs.pop('verify_SSL', False))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(key):
+            async with semaphore:
+                return await AsyncSearch(memory=True, key=key, **kwargs).memory_search()
+        return dict(zip(keys, await asyncio.gather(*(run(key) for key in keys))))
+
+    async def upload(self) -> Optional[int]:
+        """Stores the value in memory. See `Memory.upload`"""
+        text = self.pack()
+        payloads = self.payloads(text)
+        if self.cache:
+            self.cache.invalidate(self.baseurl, self.key)
+        try:
+            if len(payloads) > 1:
+                responses = await asyncio.gather(*(self.send(payload) for payload in payloads[:-1]))
+                failed = [payload['key'] for payload, (status, _) in zip(payloads, responses) if status >= 400]
+                if failed:
+                    self.log.error('Error indexing chunks {} of {} in memory.'.format(failed, self.key))
+                    return next(status for status, _ in responses if status >= 400)
+                self.log.info('Stored {} chunks of {} in memory'.format(len(responses), self.key))
+            status, content = await self.send(payloads[-1])
+            self.log.info('Memory store response status for {} indexing: {}'.format(self.key, status))
+            self.log.debug(content)
+            if self.cache and status < 400:
+                self.cache.set(self.baseurl, self.key, text, ttl=self.expire)
+            return status
+        except Exception:
+            self.log.error('Error indexing {} in memory.'.format(self.key), exc_info=True)
+        return None
+
+    async def send(self, payload: dict) -> Tuple[int, bytes]:
+        """Posts the body of a memory storage request"""
+        return await self.client.post(self.url, data=codec.dumps(payload))
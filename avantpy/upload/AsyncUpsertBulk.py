@@ -0,0 +1,127 @@
+from ..AsyncClient import AsyncClient
+from .. import codec
+from .. import utils
+from .UpsertBulk import UpsertBulk
+import asyncio
+from typing import Optional, Union, List, Tuple, Set, Any, Iterable, Dict
+
+
+class AsyncUpsertBulk(UpsertBulk):
+    """Async Bulk Uploader
+
+    A class to manage bulk uploads of data inside an asyncio event loop
+
+    Accepts the same arguments as `UpsertBulk`, reusing its chunking and result accounting.
+    `threads` is the number of chunks sent concurrently by the event loop.
+
+    Args:
+        data (iterable(dict)): List, generator or any iterable of dictionaries to be indexed [{"id":..., "index":..., "type":..., ...},...]
+        baseurl (str, optional): Baseurl to execute the upsert bulk
+        client (AsyncClient, optional): Shared async client whose url, cluster and SSL settings replace baseurl, cluster and verify_SSL
+        **kwargs (any): Arguments of `UpsertBulk`
+
+    Attributes:
+        client (AsyncClient): Async client holding the pooled connections used by the requests
+        See `UpsertBulk`
+
+    Example:
+        >>> import asyncio
+        >>> import avantpy
+        >>> upsert = avantpy.upload.AsyncUpsertBulk(dataList, baseurl='https://192.168.102.133/', threads=16)
+        >>> asyncio.run(upsert.upload())
+        INFO:avantpy.upload.UpsertBulk:Total: 3
+        INFO:avantpy.upload.UpsertBulk:Updated: 0, Created: 3. 
+        INFO:avantpy.upload.UpsertBulk:3 successfully executed with 0 failures
+        INFO:avantpy.upload.UpsertBulk:Created: 3 / Updated: 0 / Failed: 0
+    """
+
+    def __init__(self,
+                 data: Union[List[dict], Tuple[dict], Set[dict], Iterable[dict]],
+                 baseurl: Optional[str] = '',
+                 client: Optional[AsyncClient] = None,
+                 **kwargs: Any):
+        client = client or AsyncClient(baseurl,
+                                       cluster=kwargs.get('cluster', 'AvantData'),
+                                       verify_SSL=kwargs.get('verify_SSL', False),
+                                       limit=max(100, kwargs.get('threads', 1)),
+                                       compress=kwargs.get('compress', False))
+        super().__init__(data, client=client, **kwargs)
+
+    async def chunkSend(self, chunk: Union[List[dict], Tuple[dict], Set[dict]], body: Optional[bytes] = None) -> Dict[str, Any]:
+        """Sends a chunk of data to be indexed into the Elasticsearch cluster. See `UpsertBulk.chunkSend`"""
+        chunk = list(chunk)
+        try:
+            status, content = await self.client.put(self.url, data=codec.dumps({'body': chunk}) if body is None else body)
+        except Exception as e:
+            self.log.warning('Failed to send chunk of {} documents: {}'.format(len(chunk), e))
+            return self.newResult(retry=[(document, str(e)) for document in chunk], rejected=True)
+        return self.readResponse(chunk, status, content)
+
+    async def retrySend(self, chunk: List[dict], body: Optional[bytes] = None) -> bool:
+        """Sends a chunk with `chunkSend`, sending again only its documents to be retried. See `UpsertBulk.retrySend`"""
+        rejected = False
+        attempt = 0
+        try:
+            while True:
+                result = await self.chunkSend(chunk, body)
+                rejected = rejected or result['rejected']
+                if result['retry'] and attempt >= self.retries:
+                    self.giveUp(result)
+                self.merge(result)
+                if not result['retry']:
+                    return rejected
+                delay = utils.backoff(attempt, self.backoff)
+                self.log.warning('Retrying {} documents in {:.1f} seconds ({}/{})'.format(
+                    len(result['retry']), delay, attempt + 1, self.retries))
+                self.retried += len(result['retry'])
+                await asyncio.sleep(delay)
+                chunk, body = [document for document, _ in result['retry']], None
+                attempt += 1
+        except Exception as e:
+            self.log.error('Failed to send chunk of {} documents'.format(len(chunk)), exc_info=True)
+            self.merge(self.giveUp(self.newResult(retry=[(document, str(e)) for document in chunk])))
+            return True
+
+    async def upload(self) -> Optional[Dict[str, Any]]:
+        """Uploads data in chunks, sending up to `threads` chunks concurrently and reading
+        a new chunk only when less than `threads` * 2 are pending. See `UpsertBulk.upload`"""
+        sized = hasattr(self.data, '__len__')
+        if sized and not self.data:
+            self.log.info('Empty list')
+            return
+        if sized:
+            self.log.info('Total: {}'.format(len(self.data)))
+        self.total = 0
+        self.skipped = 0
+        self.oversized = []
+        semaphore = asyncio.Semaphore(max(1, self.threads))
+
+        async def send(chunk, body):
+            async with semaphore:
+                await self.retrySend(chunk, body)
+
+        async def limitedSend(chunk, body, start):
+            rejected = True
+            try:
+                rejected = await self.retrySend(chunk, body)
+            finally:
+                self.concurrency.release(start, rejected)
+        pending = set()
+        for chunk, body in self.encodedChunks():
+            if self.concurrency:
+                while pending and self.concurrency.full():
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.add(asyncio.ensure_future(limitedSend(chunk, body, self.concurrency.acquire())))
+                continue
+            if len(pending) >= max(1, self.threads) * 2:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.ensure_future(send(chunk, body)))
+        if pending:
+            await asyncio.wait(pending)
+        if not self.total:
+            self.log.info('Empty list')
+            return
+        if not sized:
+            self.log.info('Total: {}'.format(self.total))
+        self.report()
+        return self.result()
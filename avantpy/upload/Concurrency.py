@@ -0,0 +1,100 @@
+import threading
+import logging
+import time
+from typing import Optional
+
+
+class Concurrency:
+    """Adaptive Concurrency
+
+    A class to limit the number of concurrent requests with additive increase and multiplicative decrease (AIMD)
+
+    The limit starts at `minimum` and grows by one for each `limit` requests answered in time, up to
+    `maximum`. A request rejected by the cluster (such as 429 or es_rejected_execution_exception), or slower
+    than `latency`, multiplies the limit by `decrease`. Only requests started after the last decrease can
+    decrease it again, so one burst of rejections halves the limit once.
+
+    Args:
+        maximum (int, optional): Maximum number of concurrent requests
+        minimum (int, optional): Minimum and initial number of concurrent requests
+        latency (float, optional): Seconds over which a request is considered slow. If None, only rejections decrease the limit
+        decrease (float, optional): Factor applied to the limit when a request is rejected or slow
+
+    Attributes:
+        maximum (int): Maximum number of concurrent requests
+        minimum (int): Minimum and initial number of concurrent requests
+        latency (float): Seconds over which a request is considered slow
+        decrease (float): Factor applied to the limit when a request is rejected or slow
+        limit (float): Current limit, whose integer part is the number of concurrent requests allowed
+        peak (int): Highest limit reached
+        active (int): Number of requests running
+        decreased (float): Monotonic time of the last decrease
+        condition (Condition): Condition notified when a request is released
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> concurrency = Concurrency(maximum=8)
+        >>> start = concurrency.acquire()
+        >>> concurrency.release(start)
+        >>> concurrency.limit
+        2.0
+    """
+
+    def __init__(self,
+                 maximum: Optional[int] = 16,
+                 minimum: Optional[int] = 1,
+                 latency: Optional[float] = None,
+                 decrease: Optional[float] = 0.5):
+        self.log = logging.getLogger(__name__)
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.latency = latency
+        self.decrease = decrease
+        self.limit = float(self.minimum)
+        self.peak = self.minimum
+        self.active = 0
+        self.decreased = 0.0
+        self.condition = threading.Condition()
+
+    def __repr__(self):
+        return '<Concurrency of {} with {} active requests>'.format(int(self.limit), self.active)
+
+    def full(self) -> bool:
+        """Returns whether the limit of concurrent requests was reached"""
+        return self.active >= int(self.limit)
+
+    def acquire(self) -> float:
+        """Waits until a request is allowed and counts it as active
+
+        Returns:
+            The monotonic time the request started, to be passed to `release`
+        """
+        with self.condition:
+            while self.full():
+                self.condition.wait()
+            self.active += 1
+        return time.monotonic()
+
+    def release(self, start: float, rejected: Optional[bool] = False):
+        """Counts a request as finished and adjusts the limit
+
+        Args:
+            start: Time returned by `acquire`
+            rejected: Whether the cluster rejected the request or failed
+        """
+        now = time.monotonic()
+        with self.condition:
+            self.active -= 1
+            slow = self.latency is not None and now - start > self.latency
+            if rejected or slow:
+                if start >= self.decreased:
+                    self.limit = max(float(self.minimum), self.limit * self.decrease)
+                    self.decreased = now
+                    self.log.info('Concurrency decreased to {} after a {} request'.format(
+                        int(self.limit), 'rejected' if rejected else 'slow'))
+            elif self.limit < self.maximum:
+                self.limit = min(float(self.maximum), self.limit + 1 / int(self.limit))
+                if int(self.limit) > self.peak:
+                    self.peak = int(self.limit)
+                    self.log.debug('Concurrency increased to {}'.format(self.peak))
+            self.condition.notify_all()
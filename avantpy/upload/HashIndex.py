@@ -0,0 +1,94 @@
+from .. import utils
+import itertools
+import sqlite3
+import logging
+import time
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class HashIndex:
+    """Content Hash Index
+
+    A class to persist the hash of the content of each document uploaded by `UpsertBulk`, so later runs only
+    send new or changed documents
+
+    The hashes are kept in a SQLite database, which can be shared by processes in the same machine. A document
+    is identified by the url and cluster it was uploaded to, and its index, type and id.
+
+    Args:
+        path (str, optional): Path of the SQLite database file
+
+    Attributes:
+        path (str): Path of the SQLite database file
+        log (logger): Logger with __name__
+
+    Examples:
+        >>> hashes = avantpy.upload.HashIndex()
+        >>> avantpy.upload.UpsertBulk(dataList, baseurl='https://192.168.102.133/', hash_index=hashes).upload()
+        INFO:avantpy.upload.UpsertBulk:Total: 3
+        INFO:avantpy.upload.UpsertBulk:Updated: 0, Created: 3.
+        ...
+        >>> avantpy.upload.UpsertBulk(dataList, baseurl='https://192.168.102.133/', hash_index=hashes).upload()
+        INFO:avantpy.upload.UpsertBulk:Total: 3
+        INFO:avantpy.upload.UpsertBulk:3 unchanged documents skipped
+        ...
+    """
+
+    def __init__(self,
+                 path: Optional[str] = os.path.join(os.path.expanduser('~'), '.cache', 'avantpy', 'hashes.db')):
+        self.log = logging.getLogger(__name__)
+        self.path = path
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.execute('CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash TEXT, updated REAL)')
+
+    def __repr__(self):
+        return '<HashIndex in {}>'.format(self.path)
+
+    def execute(self, sql: str, *parameters: Any, many: Optional[Iterable[tuple]] = None) -> List[tuple]:
+        """Executes a statement, or the statement for each parameters of many, in its own transaction and returns the fetched rows"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                if many is not None:
+                    connection.executemany(sql, many)
+                    return []
+                return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def key(self, url: str, cluster: str, document: dict) -> Optional[str]:
+        """Returns the key identifying a document, or None if it has no id. See `utils.canonical_hash`"""
+        if document.get('id') is None:
+            return None
+        return utils.canonical_hash(url, cluster, document.get('index'), document.get('type'), document.get('id'))
+
+    def hash(self, document: dict) -> str:
+        """Returns the hash of the content of a document. See `utils.canonical_hash`"""
+        return utils.canonical_hash(document)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Returns the stored hashes of the keys that have one"""
+        keys = iter(keys)
+        hashes = {}
+        while True:
+            batch = list(itertools.islice(keys, 500))
+            if not batch:
+                return hashes
+            hashes.update(self.execute('SELECT key, hash FROM hashes WHERE key IN ({})'.format(
+                ','.join('?' * len(batch))), *batch))
+
+    def set_many(self, hashes: Iterable[Tuple[str, str]]):
+        """Stores the hash of each key"""
+        now = time.time()
+        self.execute('INSERT OR REPLACE INTO hashes (key, hash, updated) VALUES (?, ?, ?)',
+                     many=((key, value, now) for key, value in hashes))
+
+    def remove(self, keys: Iterable[str]):
+        """Removes the hashes of the keys, so their documents are sent again"""
+        self.execute('DELETE FROM hashes WHERE key = ?', many=((key,) for key in keys))
+
+    def clear(self):
+        """Removes all hashes"""
+        self.execute('DELETE FROM hashes')
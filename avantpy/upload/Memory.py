@@ -1,7 +1,11 @@
+from ..Client import Client
+from ..download.MemoryCache import MemoryCache
+from ..download.Search import Search
+from .. import utils
+from .. import codec
+import concurrent.futures
 import requests
-import socket
-import json
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, List, Optional
 import logging
 from urllib3.exceptions import InsecureRequestWarning
 
@@ -17,6 +21,11 @@ class Memory:
         expire (int, optional): Time (in seconds) before the stored data expires (default: 3600)
         api (str, optional): Endpoint for the memory storage API
         verify_SSL (bool, optional): Bool to verify SSL of requests
+        client (Client, optional): Shared client whose url and SSL settings replace baseurl and verify_SSL
+        format (str, optional): Serialization of the value, 'json' or 'msgpack'. See `codec.pack`
+        compress (str, optional): Compression of the value, None, 'zlib' or 'gzip'
+        chunk_size (int, optional): Maximum length of the string stored in a key. Larger values are split across keys
+        cache (MemoryCache, optional): Cache of memory values updated with the value for `expire` seconds on upload
 
     Attributes:
         key (str): The unique identifier for the data to be stored
@@ -27,6 +36,11 @@ class Memory:
         verify_SSL (bool): Bool to verify SSL of requests
         log (logger): Logger with __name__
         url (str): Default to join the url path with api path
+        client (Client): Client holding the pooled connections used by the requests
+        format (str): Serialization of the value, 'json' or 'msgpack'
+        compress (str): Compression of the value, None, 'zlib' or 'gzip'
+        chunk_size (int): Maximum length of the string stored in a key. Larger values are split across keys
+        cache (MemoryCache): Cache of memory values updated with the value for `expire` seconds on upload
 
     Example:
         >>> import logging
@@ -43,13 +57,23 @@ class Memory:
                  expire: Optional[int] = 3600,
                  api: Optional[str] = '/avantapi/2.0/avantData/avantMem/index',
                  verify_SSL: Optional[str] = False,
+                 client: Optional[Client] = None,
+                 format: Optional[str] = 'json',
+                 compress: Optional[str] = None,
+                 chunk_size: Optional[int] = 1 << 20,
+                 cache: Optional[MemoryCache] = None,
                  **kwargs):
         self.key = key
         self.value = value
-        self.baseurl = self.get_url(baseurl)
+        self.client = client or Client(self.get_url(baseurl), verify_SSL=verify_SSL)
+        self.baseurl = self.client.url
         self.expire = expire
         self.api = api
-        self.verify_SSL = verify_SSL
+        self.verify_SSL = self.client.verify_SSL
+        self.format = format
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.cache = cache
         self.log = logging.getLogger(__name__)
         self.url = kwargs.get('url', self.baseurl+self.api)
         requests.packages.urllib3.disable_warnings(
@@ -58,20 +82,134 @@ class Memory:
     def __repr__(self):
         return 'Data of type {} in memory as {}:\n{}'.format(type(self.value), self.key)
 
-    def upload(self):
-        if not isinstance(self.value, (list, set, tuple)):
+    def payload(self) -> dict:
+        """Returns the body of the memory storage request of `key`. See `payloads`"""
+        return self.payloads()[-1]
+
+    def pack(self) -> str:
+        """Returns the value as a list packed by `codec.pack`"""
+        if isinstance(self.value, (set, tuple)):
+            self.value = list(self.value)
+        elif not isinstance(self.value, list):
             self.value = [self.value]
-        payload = {
-            'key': self.key,
-            'value': str(self.value),
+        return codec.pack(self.value, self.format, self.compress)
+
+    def payloads(self, text: Optional[str] = None) -> List[dict]:
+        """Returns the bodies of the memory storage requests
+
+        The value is packed by `pack` and, if longer than `chunk_size`, split by `codec.split`.
+
+        Args:
+            text: Value already packed by `pack`
+
+        Returns:
+            The body of each chunk, with the body of `key` last
+        """
+        if text is None:
+            text = self.pack()
+        return [{
+            'key': key,
+            'value': value,
             'expire': self.expire
-        }
+        } for key, value in codec.split(self.key, text, self.chunk_size)]
+
+    @classmethod
+    def set_many(cls,
+                 values: Dict[str, Any],
+                 concurrency: Optional[int] = 8,
+                 **kwargs: Any) -> Dict[str, Optional[int]]:
+        """Stores many keys concurrently sharing one pooled client.
+
+        The memory api stores one key per request, so the requests are pipelined over the kept-alive
+        connections of the client, at most `concurrency` at a time.
+
+        Args:
+            values: Value of each key
+            concurrency: Number of requests running at the same time
+            kwargs: Arguments shared by all keys, such as baseurl, client or expire
+
+        Returns:
+            The status code of each key, or None if its request failed
+
+        Examples:
+            >>> avantpy.upload.Memory.set_many({'ip:10.0.0.1': 'blocked', 'ip:10.0.0.2': 'allowed'}, baseurl='https://prod.avantdata.com.br')
+            {'ip:10.0.0.1': 200, 'ip:10.0.0.2': 200}
+        """
+        if not kwargs.get('client'):
+            kwargs['client'] = Client(utils.get_url(kwargs.pop('baseurl', '')),
+                                      verify_SSL=kwargs.pop('verify_SSL', False),
+                                      pool_maxsize=max(10, concurrency))
+
+        def run(key):
+            return cls(key, values[key], **kwargs).upload()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            statuses = dict(zip(values, executor.map(run, values)))
+        logging.getLogger(__name__).info('{}/{} keys stored in memory'.format(
+            sum(1 for status in statuses.values() if status is not None and status < 400), len(statuses)))
+        return statuses
+
+    @classmethod
+    def get_many(cls,
+                 keys: Iterable[str],
+                 concurrency: Optional[int] = 8,
+                 **kwargs: Any) -> Dict[str, Optional[List[Any]]]:
+        """Reads many keys concurrently sharing one pooled client.
+
+        Args:
+            keys: Keys to be read
+            concurrency: Number of requests running at the same time
+            kwargs: Arguments of `download.Search` shared by all keys, such as url, client or memory_cache
+
+        Returns:
+            The value of each key as a list, like the `data` of `download.Search` in memory mode, or None if its request failed
+
+        Examples:
+            >>> avantpy.upload.Memory.get_many(['ip:10.0.0.1', 'ip:10.0.0.2'], url='https://prod.avantdata.com.br')
+            {'ip:10.0.0.1': ['blocked'], 'ip:10.0.0.2': ['allowed']}
+        """
+        keys = list(keys)
+        if not kwargs.get('client'):
+            kwargs['client'] = Client(utils.get_url(kwargs.pop('url', kwargs.pop('baseurl', ''))),
+                                      verify_SSL=kwargs.pop('verify_SSL', False),
+                                      pool_maxsize=max(10, concurrency))
+
+        def run(key):
+            return Search(memory=True, key=key, lazy=True, **kwargs).memory_search()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            return dict(zip(keys, executor.map(run, keys)))
+
+    def upload(self) -> Optional[int]:
+        """Stores the value in memory.
+
+        Returns:
+            The status code of the request of `key`, or of the first failed chunk, or None if a request failed
+        """
+        text = self.pack()
+        payloads = self.payloads(text)
+        if self.cache:
+            self.cache.invalidate(self.baseurl, self.key)
         try:
-            response = requests.post(self.url, data=json.dumps(payload), verify=self.verify_SSL)
+            if len(payloads) > 1:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(payloads) - 1)) as executor:
+                    responses = list(executor.map(self.send, payloads[:-1]))
+                failed = [payload['key'] for payload, response in zip(payloads, responses) if not response.ok]
+                if failed:
+                    self.log.error('Error indexing chunks {} of {} in memory.'.format(failed, self.key))
+                    return next(response.status_code for response in responses if not response.ok)
+                self.log.info('Stored {} chunks of {} in memory'.format(len(responses), self.key))
+            response = self.send(payloads[-1])
             self.log.info('Memory store response status for {} indexing: {}'.format(self.key, response.status_code))
             self.log.debug(response.text)
+            if self.cache and response.ok:
+                self.cache.set(self.baseurl, self.key, text, ttl=self.expire)
+            return response.status_code
         except Exception:
             self.log.error('Error indexing {} in memory.'.format(self.key), exc_info=True)
+        return None
+
+    def send(self, payload: dict) -> requests.Response:
+        """Posts the body of a memory storage request"""
+        return self.client.post(self.url, data=codec.dumps(payload))
 
     def get_url(self, url: str) -> str:
         """This function returns a URL string.
@@ -88,10 +226,4 @@ class Memory:
         Returns:
             str: The URL to use for API requests.
         """
-        if not url:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            host_ip = s.getsockname()[0]
-            s.close()
-            return 'https://{}'.format(host_ip)
-        return url
\ No newline at end of file
+        return utils.get_url(url)
@@ -1,6 +1,8 @@
+from ..Client import Client
+from .. import utils
+from .. import codec
 import requests
 import logging
-import socket
 import json
 import re
 from typing import Optional, Union, List, Tuple, Set, Any
@@ -27,6 +29,7 @@ class Template:
         template_name (str, optional): Template attribute of the template body
         regenerate (bool, optional): Always create template if True
         append (bool, optional): Append missing keys in the template if True
+        client (Client, optional): Shared client whose url, cluster and SSL settings replace baseurl, cluster and verify_SSL
 
 
     Attributes:
@@ -45,6 +48,7 @@ class Template:
         regenerate (bool): Always create template if True
         append (bool): Append missing keys in the template if True
         data(dict): The generated template
+        client (Client): Client holding the pooled connections used by the requests
 
     Example:
         >>> import logging
@@ -84,15 +88,19 @@ class Template:
                  custom: Optional[dict] = {},
                  regenerate: Optional[bool] = False,
                  append: Optional[bool] = False,
+                 client: Optional[Client] = None,
                  **kwargs: Any):
         self.log = logging.getLogger(__name__)
         self.name = name
         self.template = template
-        self.baseurl = self.getUrl(baseurl)
+        self.client = client or Client(self.getUrl(baseurl),
+                                       cluster=cluster,
+                                       verify_SSL=verify_SSL)
+        self.baseurl = self.client.url
         self.api = api
         self.api_create = api_create
-        self.cluster = cluster
-        self.verify_SSL = verify_SSL
+        self.cluster = self.client.cluster
+        self.verify_SSL = self.client.verify_SSL
         self.template_name = kwargs.get('template_name', self.name+'*')
         self.mapping_name = kwargs.get('mapping_name', self.name)
         self.aliases = kwargs.get('aliases', re.sub(
@@ -313,22 +321,14 @@ class Template:
         regenerate = kwargs.get('regenerate', self.regenerate)
         append = kwargs.get('append', self.append)
         if self.data:
-            headers = {
-                'cluster': self.cluster
-            }
-            response = requests.get(url=self.baseurl+self.api+'/'+self.name,
-                                    headers=headers,
-                                    verify=self.verify_SSL
-                                    )
+            response = self.client.get(self.api+'/'+self.name)
             if response.status_code == 404 or regenerate:
                 self.log.info('Uploading template {}'.format(self.name))
-                responseCreate = requests.post(url=self.baseurl+self.api_create,
-                                               headers=headers,
-                                               data=json.dumps(self.data),
-                                               verify=self.verify_SSL)
+                responseCreate = self.client.post(self.api_create,
+                                                  data=codec.dumps(self.data))
                 self.log.info(responseCreate.text)
             elif append:
-                rJson = response.json()
+                rJson = codec.loads(response.content)
                 tmps = rJson.get(next(iter(rJson)))
                 changed = False
                 appendedKeys = []
@@ -357,10 +357,8 @@ class Template:
                 }
                 if changed:
                     self.log.info('Appending keys {}'.format(appendedKeys))
-                    responseCreate = requests.post(url=self.baseurl+self.api_create,
-                                                   headers=headers,
-                                                   data=json.dumps(self.data),
-                                                   verify=self.verify_SSL)
+                    responseCreate = self.client.post(self.api_create,
+                                                      data=codec.dumps(self.data))
                     self.log.info(responseCreate.text)
                 else:
                     self.log.info(
@@ -383,10 +381,4 @@ class Template:
         Returns:
             str: The URL to use for API requests.
         """
-        if not url:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            host_ip = s.getsockname()[0]
-            s.close()
-            return 'https://{}'.format(host_ip)
-        return url
\ No newline at end of file
+        return utils.get_url(url)
@@ -1,11 +1,17 @@
 from urllib3.exceptions import InsecureRequestWarning
 from collections import Counter
+from ..Client import Client
+from .Concurrency import Concurrency
+from .HashIndex import HashIndex
+from .. import utils
+from .. import codec
 import concurrent.futures
-import socket
+import itertools
+import threading
 import logging
+import time
 import requests
-import json
-from typing import Optional, Union, List, Tuple, Set, Any
+from typing import Optional, Union, List, Tuple, Set, Any, Iterable, Iterator, Dict
 
 
 class UpsertBulk:
@@ -14,7 +20,7 @@ class UpsertBulk:
     A class to manage bulk uploads of data
 
     Args:
-        data (list(dict)): List of dictionaries to be indexed [{"id":..., "index":..., "type":..., ...},...]
+        data (iterable(dict)): List, generator or any iterable of dictionaries to be indexed [{"id":..., "index":..., "type":..., ...},...]
         baseurl (str, optional): Baseurl to execute the upsert bulk 
         api (str, optional): Endpoint where the connection with database is set
         cluster (str, optional): Header parameter for communication with the api
@@ -22,21 +28,43 @@ class UpsertBulk:
         chunk_size (int, optional): Number of documents to send in each bulk requests
         threads (int, optional): Number of threads to send each chunk of documents
         url (str, optional): Default to join the url path with api path
+        client (Client, optional): Shared client whose url, cluster and SSL settings replace baseurl, cluster and verify_SSL
+        max_bytes (int, optional): Maximum size in bytes of the body of each bulk request. Chunks are closed at `chunk_size` documents or max_bytes, whichever comes first
+        adaptive (bool, optional): Adapt the number of chunks sent concurrently to the cluster, up to `threads`. See `Concurrency`
+        latency (float, optional): Seconds over which a bulk request is considered slow by the adaptive concurrency
+        retries (int, optional): Number of times the documents rejected by the cluster or lost by a failed request are sent again
+        backoff (float, optional): Seconds to wait before the first retry, doubled on each attempt
+        compress (bool, optional): Gzip the bulk requests and log their compression ratio. See `Client`
+        hash_index (HashIndex, optional): Index of the content hashes of the uploaded documents, to only send new or changed documents
 
     Attributes:
-        data (list(dict)): List of dictionaries to be indexed [{"id":..., "index":..., "type":..., ...},...]
+        data (iterable(dict)): List, generator or any iterable of dictionaries to be indexed [{"id":..., "index":..., "type":..., ...},...]
+        total (int): Number of documents read from data by the last upload
         updated (int): Number of documents successfully updated
         created (int): Number of documents successfully created
         failed (int): Number of documents that failed indexing
+        failed_ids (list): Ids of the documents that failed indexing permanently
+        retried (int): Number of documents sent again after a transient failure
+        skipped (int): Number of documents not sent because they are unchanged in `hash_index`
         errors (dict): Dict subclass for counting hashable objects from collections (Counter)
         log (logger): Logger with __name__
         baseurl (str): Baseurl to execute the upsert bulk 
         api (str): Endpoint where the connection with database is set
         cluster (str): Header parameter for communication with the api
         verify_SSL (bool): Bool to verify SSL of requests
+        compress (bool): Gzip the bulk requests and log their compression ratio
+        hash_index (HashIndex): Index of the content hashes of the uploaded documents, to only send new or changed documents
+        hashes (dict): Content hashes of the documents being sent, stored in `hash_index` once indexed
         chunk_size (int): Number of documents to send in each bulk requests
         threads (int): Number of threads to send each chunk of documents
         url (str): Default to join the url path with api path
+        client (Client): Client holding the pooled connections used by the requests
+        max_bytes (int): Maximum size in bytes of the body of each bulk request
+        oversized (list): Ids of the documents larger than max_bytes by themselves, which were not sent
+        concurrency (Concurrency): Adaptive limit of chunks sent concurrently, if adaptive
+        retries (int): Number of times the documents rejected by the cluster or lost by a failed request are sent again
+        backoff (float): Seconds to wait before the first retry, doubled on each attempt
+        lock (Lock): Lock guarding the counters merged by the threads
 
     Example:
         >>> import logging
@@ -54,78 +82,316 @@ class UpsertBulk:
     """
 
     def __init__(self,
-                 data: Union[List[dict], Tuple[dict], Set[dict]],
+                 data: Union[List[dict], Tuple[dict], Set[dict], Iterable[dict]],
                  baseurl: Optional[str] = '',
                  api: Optional[str] = '/avantapi/avantData/index/bulk/general/upsert',
                  cluster: Optional[str] = 'AvantData',
                  verify_SSL: Optional[bool] = False,
                  chunk_size: Optional[int] = 1000,
                  threads: Optional[int] = 1,
+                 client: Optional[Client] = None,
+                 max_bytes: Optional[int] = None,
+                 adaptive: Optional[bool] = False,
+                 latency: Optional[float] = None,
+                 retries: Optional[int] = 3,
+                 backoff: Optional[float] = 0.5,
+                 compress: Optional[bool] = False,
+                 hash_index: Optional[HashIndex] = None,
                  **kwargs: Any):
         self.log = logging.getLogger(__name__)
-        self.baseurl = self.getUrl(baseurl)
+        self.client = client or Client(self.getUrl(baseurl),
+                                       cluster=cluster,
+                                       verify_SSL=verify_SSL,
+                                       pool_maxsize=max(10, threads),
+                                       compress=compress)
+        self.baseurl = self.client.url
         self.api = api
-        self.cluster = cluster
-        self.verify_SSL = verify_SSL
+        self.cluster = self.client.cluster
+        self.verify_SSL = self.client.verify_SSL
+        self.compress = self.client.compress
         self.chunk_size = chunk_size
         self.threads = threads
+        self.max_bytes = max_bytes
+        self.oversized = []
+        self.concurrency = Concurrency(maximum=threads, latency=latency) if adaptive else None
+        self.retries = retries
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self.hash_index = hash_index
+        self.hashes = {}
         self.data = data
         self.url = kwargs.get('url', self.baseurl+self.api)
+        self.total = 0
         self.updated, self.created, self.failed = (0, 0, 0)
+        self.failed_ids = []
+        self.retried = 0
+        self.skipped = 0
         self.errors = Counter()
         requests.packages.urllib3.disable_warnings(
             category=InsecureRequestWarning)
 
     def __repr__(self):
-        return '{} documents ready to be uploaded to {}. Use upload() method to upload'.format(len(self.data), self.baseurl)
+        if hasattr(self.data, '__len__'):
+            return '{} documents ready to be uploaded to {}. Use upload() method to upload'.format(len(self.data), self.baseurl)
+        return 'Documents ready to be uploaded to {}. Use upload() method to upload'.format(self.baseurl)
 
-    def chunkSend(self, chunk: Union[List[dict], Tuple[dict], Set[dict]]):
+    def chunkSend(self, chunk: Union[List[dict], Tuple[dict], Set[dict]], body: Optional[bytes] = None) -> Dict[str, Any]:
         """Sends a chunk of data to be indexed into the Elasticsearch cluster.
 
         Args:
             chunk (list(dict) or tuple(dict) or set(dict)): A list of dictionaries to be indexed.
+            body (bytes, optional): The chunk already serialized by `encodedChunks`.
 
         The function sends a chunk of data to be indexed into the Elasticsearch cluster by making a PUT request
-        to the Elasticsearch server. The data is sent as a JSON object in the request body, and the 'cluster' header 
+        to the Elasticsearch server through the pooled connections of `client`. The data is serialized once with `codec` and sent as a JSON object in the request body, and the 'cluster' header 
         is set to the cluster name provided during object instantiation.
 
-        The function then processes the response returned from the Elasticsearch server. It updates the 'updated'
-        and 'created' counters based on the number of documents that were updated and created, respectively. If there
-        were any errors during indexing, the function updates the 'errors' dictionary with the count of errors
-        encountered, along with the reason for each error.
+        The function then processes the response returned from the Elasticsearch server with `countResults`. If the
+        request failed with an exception, a 429 or a 5xx status, all documents of the chunk are to be retried.
+        The counters are not changed: the result is merged by `merge`.
+
+        Returns:
+            The result of the chunk. See `countResults`
+        """
+        chunk = list(chunk)
+        try:
+            response_bulk = self.client.put(self.url, data=codec.dumps({'body': chunk}) if body is None else body)
+        except Exception as e:
+            self.log.warning('Failed to send chunk of {} documents: {}'.format(len(chunk), e))
+            return self.newResult(retry=[(document, str(e)) for document in chunk], rejected=True)
+        return self.readResponse(chunk, response_bulk.status_code, response_bulk.content)
+
+    def readResponse(self, chunk: List[dict], status: int, content: bytes) -> Dict[str, Any]:
+        """Returns the result of the response of a chunk. See `countResults`"""
+        reason = 'Status code {}'.format(status)
+        if utils.retryable(status):
+            return self.newResult(retry=[(document, reason) for document in chunk], rejected=True)
+        try:
+            response_json = codec.loads(content)
+        except Exception:
+            response_json = None
+        if status >= 400 or not isinstance(response_json, dict) or not response_json.get('items'):
+            self.log.warning('Failed to index chunk of {} documents: {}'.format(len(chunk), content[:1000]))
+            return self.newResult(errors=Counter({reason: len(chunk)}),
+                                  failed=[self.documentId(document) for document in chunk])
+        return self.countResults(response_json, chunk)
+
+    def newResult(self, **result: Any) -> Dict[str, Any]:
+        """Returns an empty result of a chunk updated with result. See `countResults`"""
+        return {'updated': 0, 'created': 0, 'errors': Counter(), 'failed': [], 'retry': [], 'indexed': [],
+                'rejected': False, **result}
+
+    def documentId(self, document: Any) -> Any:
+        """Returns the id of a document, or None if it has none"""
+        return document.get('id') if isinstance(document, dict) else None
+
+    def countResults(self, response_json: dict, chunk: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Counts the items of a bulk response.
+
+        Items rejected because the cluster is overloaded (es_rejected_execution_exception, 429 or 5xx) are to
+        be retried. Items with other errors failed permanently.
+
+        Args:
+            response_json (dict): Parsed response of a bulk request
+            chunk (list(dict), optional): Documents of the request, in the order of the items
+
+        Returns:
+            The result of the chunk: the number of documents 'updated' and 'created', the reasons of the
+            'errors', the ids of the 'failed' documents, the documents to 'retry' with their reasons and whether
+            the chunk was 'rejected' by the cluster and the 'indexed' documents
+        """
+        result = self.newResult()
+        for i, item in enumerate(response_json.get('items') or []):
+            update = item.get('update') or {}
+            error = update.get('error')
+            document = chunk[i] if chunk is not None and i < len(chunk) else None
+            if not error:
+                if update.get('result') in ('updated', 'created'):
+                    result[update.get('result')] += 1
+                if document is not None:
+                    result['indexed'].append(document)
+                continue
+            reason = error.get('reason') if isinstance(error, dict) else str(error)
+            if ((isinstance(error, dict) and error.get('type') == 'es_rejected_execution_exception')
+                    or utils.retryable(update.get('status'))):
+                result['rejected'] = True
+                if document is not None:
+                    result['retry'].append((document, reason))
+                    continue
+            result['errors'][reason] += 1
+            result['failed'].append(self.documentId(document))
+        return result
+
+    def merge(self, result: Dict[str, Any]):
+        """Adds the result of a chunk to the counters, safely from any thread, and stores the hashes of
+        its indexed documents in `hash_index`."""
+        with self.lock:
+            self.updated += result['updated']
+            self.created += result['created']
+            self.errors.update(result['errors'])
+            self.failed_ids.extend(result['failed'])
+            self.log.info('Updated: {}, Created: {}. '.format(
+                self.updated, self.created))
+            if self.hash_index:
+                keys = (self.hash_index.key(self.baseurl, self.cluster, document) for document in result['indexed'])
+                hashes = [(key, self.hashes.pop(key)) for key in keys if key in self.hashes]
+        if self.hash_index and hashes:
+            self.hash_index.set_many(hashes)
+
+    def giveUp(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Marks the documents to be retried of a result as failed permanently."""
+        for document, reason in result['retry']:
+            result['errors'][reason] += 1
+            result['failed'].append(self.documentId(document))
+        result['retry'] = []
+        return result
+
+    def retrySend(self, chunk: List[dict], body: Optional[bytes] = None) -> bool:
+        """Sends a chunk with `chunkSend`, sending again only its documents to be retried.
+
+        The documents are retried up to `retries` times with exponential `backoff` and jitter. Any
+        exception is captured, so the documents of the chunk are counted as failed instead of lost.
+
+        Returns:
+            Whether the cluster rejected any request, so the adaptive `concurrency` backs off
         """
-        json_to_send = {'body': json.loads(json.dumps(chunk))}
-        headers = {'cluster': self.cluster}
-        response_bulk = requests.put(url=self.url,
-                                    headers=headers,
-                                    data=json.dumps(json_to_send),
-                                    verify=self.verify_SSL)
+        rejected = False
+        attempt = 0
         try:
-            response_json = json.loads(response_bulk.text)
-            if response_json.get('items'):
-                results = Counter(item.get('update').get('result')
-                                  for item in response_json.get('items'))
-                self.updated += results.get('updated', 0)
-                self.created += results.get('created', 0)
-                if response_json.get('errors'):
-                    self.errors.update(Counter(item.get('update').get('error').get(
-                        'reason') for item in response_json.get('items') if item.get('update').get('error')))
-                self.log.info('Updated: {}, Created: {}. '.format(
-                    self.updated, self.created))
+            while True:
+                result = self.chunkSend(chunk, body)
+                rejected = rejected or result['rejected']
+                if result['retry'] and attempt >= self.retries:
+                    self.giveUp(result)
+                self.merge(result)
+                if not result['retry']:
+                    return rejected
+                delay = utils.backoff(attempt, self.backoff)
+                self.log.warning('Retrying {} documents in {:.1f} seconds ({}/{})'.format(
+                    len(result['retry']), delay, attempt + 1, self.retries))
+                with self.lock:
+                    self.retried += len(result['retry'])
+                time.sleep(delay)
+                chunk, body = [document for document, _ in result['retry']], None
+                attempt += 1
         except Exception as e:
-            self.log.warning(response_bulk.text)
-            self.log.error(e)
+            self.log.error('Failed to send chunk of {} documents'.format(len(chunk)), exc_info=True)
+            self.merge(self.giveUp(self.newResult(retry=[(document, str(e)) for document in chunk])))
+            return True
+
+    def limitedSend(self, chunk: List[dict], body: Optional[bytes], start: float):
+        """Sends a chunk with `retrySend` and releases its slot of the adaptive `concurrency`."""
+        rejected = True
+        try:
+            rejected = self.retrySend(chunk, body)
+        finally:
+            self.concurrency.release(start, rejected)
+
+    def documents(self) -> Iterator[dict]:
+        """Reads the `data` attribute, counting its documents in `total`.
+
+        With `hash_index`, documents are read in batches of `chunk_size` and only those whose content hash
+        differs from the stored one are yielded. The others are counted in `skipped`.
+
+        Yields:
+            Documents to be sent
+        """
+        if not self.hash_index:
+            for document in self.data:
+                self.total += 1
+                yield document
+            return
+        documents = iter(self.data)
+        while True:
+            batch = list(itertools.islice(documents, self.chunk_size))
+            if not batch:
+                return
+            self.total += len(batch)
+            yield from self.changed(batch)
+
+    def changed(self, batch: List[dict]) -> List[dict]:
+        """Returns the documents of a batch that are new or changed in `hash_index`, keeping their hashes in `hashes`"""
+        keys = [self.hash_index.key(self.baseurl, self.cluster, document) for document in batch]
+        stored = self.hash_index.get_many(key for key in keys if key is not None)
+        changed = []
+        for document, key in zip(batch, keys):
+            if key is None:
+                changed.append(document)
+                continue
+            value = self.hash_index.hash(document)
+            if stored.get(key) == value:
+                self.skipped += 1
+                continue
+            with self.lock:
+                self.hashes[key] = value
+            changed.append(document)
+        return changed
+
+    def chunks(self) -> Iterator[List[dict]]:
+        """Reads the `data` attribute in chunks of `chunk_size` documents. See `documents`
 
-    def upload(self):
+        Documents are only read from data when the next chunk is requested, so generators are
+        never materialized.
+
+        Yields:
+            Chunks to be sent with `chunkSend`
+        """
+        documents = self.documents()
+        while True:
+            chunk = list(itertools.islice(documents, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def encodedChunks(self) -> Iterator[Tuple[List[dict], Optional[bytes]]]:
+        """Reads the `data` attribute in chunks with their request bodies.
+
+        Without `max_bytes`, yields the chunks of `chunks` to be serialized by `chunkSend`. With `max_bytes`,
+        each document is serialized once, and its size decides whether it fits in the current chunk. The body
+        is then joined from the serialized documents. Documents larger than `max_bytes` by themselves are
+        skipped and their ids are added to `oversized`.
+
+        Yields:
+            Each chunk and its serialized body, or None to be serialized by `chunkSend`
+        """
+        if not self.max_bytes:
+            for chunk in self.chunks():
+                yield chunk, None
+            return
+        empty = len(b'{"body":[]}')
+        chunk, encoded, size = [], [], empty
+        for document in self.documents():
+            data = codec.dumps(document)
+            if empty + len(data) > self.max_bytes:
+                self.oversized.append(document.get('id') if isinstance(document, dict) else None)
+                self.log.warning('Document {} of {} bytes is over max_bytes and will not be sent'.format(
+                    self.oversized[-1], len(data)))
+                continue
+            if chunk and (len(chunk) >= self.chunk_size or size + len(data) + 1 > self.max_bytes):
+                yield chunk, b'{"body":[' + b','.join(encoded) + b']}'
+                chunk, encoded, size = [], [], empty
+            chunk.append(document)
+            encoded.append(data)
+            size += len(data) + (1 if len(encoded) > 1 else 0)
+        if chunk:
+            yield chunk, b'{"body":[' + b','.join(encoded) + b']}'
+
+    def upload(self) -> Optional[Dict[str, Any]]:
         """This function uploads data in chunks and returns a status message.
         
         If the `data` attribute of the object is not empty, the function logs the total number of items in the `data`
-        list, and splits the list into chunks (of size `chunk_size`) for concurrent processing using threads (number of
-        threads is `threads`).
+        list, and reads it in chunks (of size `chunk_size`) for concurrent processing using threads (number of
+        threads is `threads`). Generators and other iterables without length are read lazily and their total is
+        logged at the end.
         
         If `threads` is greater than 1, the function uses `concurrent.futures.ThreadPoolExecutor` to execute the
-        `chunkSend` method on the chunks concurrently. If `threads` is 1 or less, the function executes the `chunkSend`
-        method on each chunk sequentially.
+        `retrySend` method on the chunks concurrently, reading a new chunk only when less than `threads` * 2 chunks
+        are waiting or being sent, so memory stays bounded. If `threads` is 1 or less, the function executes the
+        `retrySend` method on each chunk sequentially. With `max_bytes`, chunks are also closed by the size of their
+        body. See `encodedChunks`. If `adaptive`, the number of chunks sent concurrently starts at 1 and is adapted
+        by `concurrency` up to `threads`. Only the documents rejected by the cluster or lost by a failed request are
+        sent again, up to `retries` times, and the results of the threads are merged under `lock`. With `hash_index`,
+        unchanged documents are skipped. See `documents`
         
         If there were any errors during execution, the function logs the reasons for the failures along with the number
         of items that failed.
@@ -134,30 +400,80 @@ class UpsertBulk:
         that failed.
         
         Returns:
-            A string representing the status of the upload operation. The string logs the total number of items in the `data`
-        list, the number of items that were created and updated successfully, as well as the number of items that failed.
+            The result of the upload, with the 'total' number of documents, the number 'created', 'updated', 'failed',
+            'retried' and 'skipped', the 'failed_ids', the reasons of the 'errors' and the 'oversized' ids, or None if `data` is empty
         """
-        if self.data:
+        sized = hasattr(self.data, '__len__')
+        if sized and not self.data:
+            self.log.info('Empty list')
+            return
+        if sized:
             self.log.info('Total: {}'.format(len(self.data)))
-            chunks = [self.data]
-            if len(self.data) > self.chunk_size:
-                chunks = [self.data[x:x+self.chunk_size]
-                          for x in range(0, len(self.data), self.chunk_size)]
-            if self.threads > 1:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
-                    executor.map(self.chunkSend, chunks)
-            else:
-                for chunk in chunks:
-                    self.chunkSend(chunk)
-            if self.errors:
-                self.failed += sum(self.errors.values())
-                for k, v in self.errors.items():
-                    self.log.warning('{} failed. Reason: {}'.format(v, k))
-            self.log.info('{} successfully executed with {} failures'.format(
-                self.updated+self.created, self.failed))
-            self.log.info('Created: {} / Updated: {} / Failed: {}'.format(self.created, self.updated, self.failed))
+        self.total = 0
+        self.skipped = 0
+        self.oversized = []
+        if self.concurrency and self.threads > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+                pending = set()
+                for chunk, body in self.encodedChunks():
+                    start = self.concurrency.acquire()
+                    pending = {future for future in pending if not future.done()}
+                    pending.add(executor.submit(self.limitedSend, chunk, body, start))
+                concurrent.futures.wait(pending)
+        elif self.threads > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+                pending = set()
+                for chunk, body in self.encodedChunks():
+                    if len(pending) >= self.threads * 2:
+                        _, pending = concurrent.futures.wait(
+                            pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    pending.add(executor.submit(self.retrySend, chunk, body))
+                concurrent.futures.wait(pending)
         else:
+            for chunk, body in self.encodedChunks():
+                self.retrySend(chunk, body)
+        if not self.total:
             self.log.info('Empty list')
+            return
+        if not sized:
+            self.log.info('Total: {}'.format(self.total))
+        self.report()
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        """Returns the result of the upload. See `upload`"""
+        return {'total': self.total,
+                'created': self.created,
+                'updated': self.updated,
+                'failed': self.failed,
+                'retried': self.retried,
+                'skipped': self.skipped,
+                'failed_ids': list(self.failed_ids),
+                'errors': dict(self.errors),
+                'oversized': list(self.oversized)}
+
+    def report(self):
+        """Counts the failures and logs the reasons and totals of the upload."""
+        self.failed = len(self.failed_ids)
+        self.hashes = {}
+        if self.skipped:
+            self.log.info('{} unchanged documents skipped'.format(self.skipped))
+        if self.retried:
+            self.log.info('{} documents retried'.format(self.retried))
+        if self.errors:
+            for k, v in self.errors.items():
+                self.log.warning('{} failed. Reason: {}'.format(v, k))
+        if self.oversized:
+            self.log.warning('{} documents over {} bytes not sent: {}'.format(
+                len(self.oversized), self.max_bytes, self.oversized))
+        if self.concurrency:
+            self.log.info('Adaptive concurrency ended at {} with a peak of {}'.format(
+                int(self.concurrency.limit), self.concurrency.peak))
+        if self.compress:
+            self.log.info(self.client.compression())
+        self.log.info('{} successfully executed with {} failures'.format(
+            self.updated+self.created, self.failed))
+        self.log.info('Created: {} / Updated: {} / Failed: {}'.format(self.created, self.updated, self.failed))
 
     def getUrl(self, url: str) -> str:
         """This function returns a URL string.
@@ -174,10 +490,4 @@ class UpsertBulk:
         Returns:
             str: The URL to use for API requests.
         """
-        if not url:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            host_ip = s.getsockname()[0]
-            s.close()
-            return 'https://{}'.format(host_ip)
-        return url
\ No newline at end of file
+        return utils.get_url(url)
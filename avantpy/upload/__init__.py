@@ -2,4 +2,8 @@
 
 from ..upload.Template import *
 from ..upload.UpsertBulk import *
-from ..upload.Memory import *
\ No newline at end of file
+from ..upload.Memory import *
+from ..upload.Concurrency import *
+from ..upload.HashIndex import *
+from ..upload.AsyncUpsertBulk import *
+from ..upload.AsyncMemory import *
\ No newline at end of file
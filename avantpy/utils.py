@@ -17,6 +17,49 @@ def generateID(data: Any) -> str:
         data = json.dumps(data)
     return hashlib.md5(data.encode('utf-8')).hexdigest()
 
+def canonical_hash(*args: Any) -> str:
+    """Generates a sha256 hash of the arguments that does not depend on the order of dictionary keys,
+    ideal to identify a query
+
+    Args:
+        args: Objects to be hashed, such as url and query body
+
+    Returns:
+        The generated sha256 hash
+    """
+    import hashlib
+    import json
+    canonical = json.dumps(args, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def retryable(status: Optional[int]) -> bool:
+    """Checks if a response status code is a transient error worth retrying,
+    such as too many requests (429) or a server error (5xx)
+
+    Args:
+        status: Status code of the response
+
+    Returns:
+        True if the request should be retried
+    """
+    return status is not None and (status == 429 or status >= 500)
+
+def backoff(attempt: int, base: Optional[float] = 0.5, cap: Optional[float] = 30) -> float:
+    """Returns the seconds to wait before retrying a request, growing exponentially with
+    the attempt and with jitter so concurrent clients do not retry at the same time
+
+    Args:
+        attempt: Number of the retry, starting at 0
+        base: Seconds to wait before the first retry
+        cap: Maximum seconds to wait
+
+    Returns:
+        Between half and all of min(cap, base * 2 ** attempt)
+    """
+    import random
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
 def edit(
     data: Union[List[dict], Tuple[dict], Set[dict]],
     keys: Optional[Union[dict, list, tuple, set, Callable]] = None,
@@ -7,6 +7,7 @@ setup(
     long_description=open('README.md').read(),
     author='AvantData',
     install_requires=['requests', 'dateparser'],
+    extras_require={'fast': ['orjson'], 'columns': ['numpy', 'pandas'], 'async': ['aiohttp'], 'msgpack': ['msgpack']},
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
     test_suite='tests',
@@ -0,0 +1,182 @@
+import collections
+import itertools
+import datetime
+import requests
+import json
+
+
+class Response:
+    def __init__(self, body, status_code=200):
+        self.content = json.dumps(body).encode()
+        self.text = self.content.decode()
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {}
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError('{} Error'.format(self.status_code), response=self)
+
+
+class Cluster:
+    """Client answering the search endpoints over documents with an integer `GenerateTime`
+
+    fail is called with the endpoint and payload of each request and returns a status code to answer
+    with instead, or None.
+    """
+    url, cluster, verify_SSL, compress = 'http://fake', 'AvantData', False, False
+
+    def __init__(self, documents=23, fail=None, scroll_size=None):
+        self.documents = [{'_id': str(i), '_type': 'doc', '_index': 'fake',
+                           '_source': {'GenerateTime': 1000 + i, 'n': i}} for i in range(documents)]
+        self.fail = fail or (lambda api, payload: None)
+        self.scroll_size = scroll_size
+        self.scrolls = {}
+        self.ids = itertools.count()
+        self.requests = []
+
+    def post(self, api, data=None, **kwargs):
+        payload = json.loads(data)
+        self.requests.append((api.rsplit('/', 1)[-1], payload))
+        status = self.fail(api.rsplit('/', 1)[-1], payload)
+        if status:
+            return Response({'error': 'fake'}, status)
+        if api.endswith('scrollSearch'):
+            if payload['scroll_id'] not in self.scrolls:
+                return Response({'error': 'search_context_missing_exception'}, 404)
+            documents, size = self.scrolls[payload['scroll_id']]
+            self.scrolls[payload['scroll_id']] = (documents[size:], size)
+            return Response({'took': 1, '_scroll_id': payload['scroll_id'],
+                             'hits': {'total': len(documents), 'hits': documents[:size]}})
+        return Response(self.search(payload))
+
+    def search(self, payload):
+        body = payload['body']
+        documents = [d for d in self.documents if self.matches(d, body['query']['bool'].get('filter'))]
+        if 'slice' in body:
+            documents = [d for d in documents if int(d['_id']) % body['slice']['max'] == body['slice']['id']]
+        sort = [list(field)[0] for field in body.get('sort', [])]
+        documents.sort(key=lambda d: [-self.value(d, field) for field in sort])
+        documents = [{**d, 'sort': [self.value(d, field) for field in sort]} for d in documents]
+        response = {'took': 1, 'hits': {'total': len(documents), 'hits': []}}
+        if body.get('aggs'):
+            response['aggregations'] = {name: self.aggregate(documents, agg) for name, agg in body['aggs'].items()}
+            return response
+        if 'search_after' in body:
+            documents = [d for d in documents if d['sort'] < body['search_after']]
+        size = body.get('size', 10)
+        response['hits']['hits'] = documents[:size]
+        if 'scroll' in payload and size:
+            scrollID = str(next(self.ids))
+            self.scrolls[scrollID] = (documents[size:], self.scroll_size or size)
+            response['_scroll_id'] = scrollID
+        return response
+
+    def value(self, document, field):
+        if field == '_id':
+            return int(document['_id'])
+        if field in ('_index', '_type'):
+            return document[field]
+        return document['_source'][field]
+
+    def matches(self, document, filters):
+        for filter in filters if isinstance(filters, list) else [filters or {}]:
+            for field, bounds in filter.get('range', {}).items():
+                value = document['_source'].get(field)
+                for op, bound in bounds.items():
+                    if not isinstance(bound, (int, float)):
+                        continue
+                    if not {'gt': value > bound, 'gte': value >= bound,
+                            'lt': value < bound, 'lte': value <= bound}[op]:
+                        return False
+        return True
+
+    def aggregate(self, documents, agg):
+        if 'stats' in agg:
+            values = [d['_source'][agg['stats']['field']] for d in documents]
+            return {'count': len(values), 'min': min(values, default=None), 'max': max(values, default=None)}
+        if 'range' in agg:
+            field = agg['range']['field']
+            return {'buckets': [{'from': r['from'], 'to': r['to'],
+                                 'doc_count': sum(r['from'] <= d['_source'][field] < r['to'] for d in documents)}
+                                for r in agg['range']['ranges']]}
+        if 'terms' in agg:
+            counts = collections.Counter(self.value(d, agg['terms']['field']) for d in documents)
+            return {'buckets': [{'key': key, 'doc_count': count}
+                                for key, count in counts.most_common(agg['terms'].get('size', 10))]}
+        if 'date_histogram' in agg:
+            interval = agg['date_histogram']['interval']
+            step = int(interval.rstrip('mshd')) * {'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000,
+                                                   'd': 86400000}[interval.lstrip('0123456789')]
+            counts = collections.Counter(self.value(d, agg['date_histogram']['field']) // step * step
+                                         for d in documents)
+            return {'buckets': [{'key': key, 'doc_count': counts[key],
+                                 'key_as_string': datetime.datetime.fromtimestamp(
+                                     key / 1000, datetime.timezone.utc).isoformat(timespec='milliseconds')[:-6] + 'Z'}
+                                for key in sorted(counts)]}
+        if 'max' in agg:
+            return {'value': max((d['_source'][agg['max']['field']] for d in documents), default=None)}
+        if 'composite' in agg:
+            composite = agg['composite']
+            groups = {}
+            for d in documents:
+                groups.setdefault(tuple(self.source(d, source) for source in composite['sources']), []).append(d)
+            keys = sorted(groups)
+            if 'after' in composite:
+                keys = [key for key in keys if key > tuple(composite['after'].items())]
+            buckets = [{'key': dict(key), 'doc_count': len(groups[key]),
+                        **{name: self.aggregate(groups[key], sub) for name, sub in agg.get('aggs', {}).items()}}
+                       for key in keys[:composite.get('size', 10)]]
+            return {'buckets': buckets, **({'after_key': buckets[-1]['key']} if buckets else {})}
+        return {}
+
+    def source(self, document, source):
+        """Returns the (name, value) of a terms or histogram source of a composite aggregation"""
+        (name, spec), = source.items()
+        value = self.value(document, (spec.get('terms') or spec.get('histogram'))['field'])
+        if 'histogram' in spec:
+            value -= value % spec['histogram']['interval']
+        return name, value
+
+
+class AsyncCluster(Cluster):
+    """Async client of `Cluster`"""
+
+    async def post(self, api, data=None, **kwargs):
+        response = Cluster.post(self, api, data=data)
+        return response.status_code, response.content
+
+    async def close(self):
+        pass
+
+
+class MemoryStore:
+    """Client answering the memory index and search endpoints with a dictionary of values
+
+    fail is called with the key of each index request and returns a status code to answer with instead, or None.
+    """
+    url, cluster, verify_SSL, compress = 'http://fake', 'AvantData', False, False
+
+    def __init__(self, fail=None):
+        self.values = {}
+        self.fail = fail or (lambda key: None)
+
+    def post(self, api, data=None, **kwargs):
+        payload = json.loads(data)
+        if api.endswith('/search'):
+            if payload['key'] not in self.values:
+                return Response({'error': 'not found'}, 404)
+            return Response(self.values[payload['key']])
+        status = self.fail(payload['key'])
+        if status:
+            return Response({'error': 'fake'}, status)
+        self.values[payload['key']] = payload['value']
+        return Response({'result': 'created'})
+
+
+class AsyncMemoryStore(MemoryStore):
+    """Async client of `MemoryStore`"""
+
+    async def post(self, api, data=None, **kwargs):
+        response = MemoryStore.post(self, api, data=data)
+        return response.status_code, response.content
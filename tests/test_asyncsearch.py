@@ -0,0 +1,85 @@
+from avantpy.download import AsyncSearch, Search, Checkpoint, Cache
+from .fake import Cluster, AsyncCluster
+import asyncio
+import sys
+import pytest
+
+pytest.importorskip('aiohttp')
+
+def search(**kwargs):
+    s = AsyncSearch(**kwargs)
+    asyncio.run(s.search())
+    return s
+
+def test_asyncsearch_does_not_build_a_sync_client(monkeypatch):
+    monkeypatch.setattr(sys.modules['avantpy.download.Search'], 'Client', None)
+    s = search(client=AsyncCluster(), size=5)
+    assert sorted(d['n'] for d in s.data) == list(range(23))
+    assert s.outcome['status'] == 'complete'
+
+def test_asyncsearch_checkpoint_key_uses_async_cluster(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoints.db'))
+    client, asyncClient = Cluster(), AsyncCluster()
+    client.cluster = asyncClient.cluster = 'Other'
+    s = search(client=asyncClient, checkpoint=checkpoint)
+    assert s.checkpointKey == Search(client=client, checkpoint=checkpoint, lazy=True).checkpointKey
+    assert checkpoint.get(s.checkpointKey) == 1022
+
+def test_asyncsearch_failed_slice():
+    fail = lambda api, payload: 503 if payload.get('body', {}).get('slice', {}).get('id') == 1 else None
+    s = search(client=AsyncCluster(fail=fail), size=5, slices=3, retries=0)
+    assert 0 < len(s.data) < 23 and s.outcome['status'] == 'partial'
+
+def test_asyncsearch_resumes_lost_scroll():
+    scrolls = []
+    fail = lambda api, payload: scrolls.append(api) or (404 if api == 'scrollSearch' and len(scrolls) == 2 else None)
+    s = search(client=AsyncCluster(fail=fail, scroll_size=3), size=5, backoff=0)
+    assert sorted(d['n'] for d in s.data) == list(range(23)) and s.resumed == 1
+
+def test_asyncsearch_unsupported_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncSearch(client=AsyncCluster(), windows=2)
+    with pytest.raises(ValueError):
+        AsyncSearch(client=AsyncCluster(), cache=Cache(str(tmp_path)))
+    s = AsyncSearch(client=AsyncCluster())
+    for method in (lambda: s.export(str(tmp_path / 'fake.ndjson')), s.windowRanges, s.windowPages):
+        with pytest.raises(ValueError):
+            method()
+
+def test_asyncsearch_scroll_search():
+    s = AsyncSearch(client=AsyncCluster(), size=5)
+
+    async def scroll():
+        pages = s.searchPages()
+        s.data = list(await pages.__anext__())
+        await pages.aclose()
+        await s.scrollSearch()
+    asyncio.run(scroll())
+    assert sorted(d['_source']['n'] for d in s.data) == list(range(23))
+
+def test_asyncsearch_batch_arguments_and_payloads():
+    client = AsyncCluster()
+    payload = lambda **kwargs: Search(client=Cluster(), index='fake', lazy=True, **kwargs).makeQuery()
+    searches = asyncio.run(AsyncSearch.batch([{'index': 'fake', 'size': 5},
+                                              payload(size=5),
+                                              payload(size=5, pagination='search_after'),
+                                              payload(aggs={'bounds': {'stats': {'field': 'GenerateTime'}}})],
+                                             client=client))
+    assert [len({d['id'] for d in s.data}) for s in searches[:3]] == [23, 23, 23]
+    assert [s.outcome['status'] for s in searches[:3]] == ['complete'] * 3
+    assert searches[3].data == [{'bounds': {'count': 23, 'min': 1000, 'max': 1022}}]
+
+def test_asyncsearch_shares_the_pagers_of_a_query():
+    s = AsyncSearch(client=AsyncCluster(), size=5)
+    query = s.windowQuery(1010, 1020)
+
+    async def hits(pages):
+        return sorted([hit['_source']['n'] async for page in pages for hit in page])
+    assert asyncio.run(hits(s.searchPages(query=query))) == list(range(10, 20))
+    assert asyncio.run(hits(s.searchAfterPages(query))) == list(range(10, 20))
+    assert s.total == 20 and s.failures == 0
+
+def test_asyncsearch_count_and_histogram():
+    s = AsyncSearch(client=AsyncCluster())
+    assert asyncio.run(s.count()) == 23
+    assert asyncio.run(s.histogram()) == {'fake': 23}
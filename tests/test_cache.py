@@ -0,0 +1,33 @@
+from avantpy.download import Cache
+
+def test_cache(tmp_path):
+    cache = Cache(str(tmp_path), ttl=60, stale=0)
+    query = {'index': 'iana', 'body': {'query': {'range': {'GenerateTime': {'gte': 0}}}}}
+    key = cache.key('https://localhost', query)
+    assert cache.read(key) is None
+    pages = [[{'_id': '1'}], [{'_id': '2'}, {'_id': '3'}]]
+    assert list(cache.write(key, iter(pages), cache.expiration(query), total=lambda: 3)) == pages
+    meta, cached = cache.read(key)
+    assert meta['total'] == 3 and meta['documents'] == 3
+    assert list(cached) == pages
+
+def test_cache_now(tmp_path):
+    cache = Cache(str(tmp_path), ttl=60, stale=0)
+    query = {'filter': {'GenerateTime': {'lte': 'now'}}}
+    assert cache.expiration(query) == 0
+    key = cache.key(query)
+    list(cache.write(key, iter([[1]]), cache.expiration(query)))
+    assert cache.read(key) is None
+
+def test_cache_interrupted(tmp_path):
+    cache = Cache(str(tmp_path))
+    pages = cache.write('key', iter([[1], [2]]), 60)
+    next(pages)
+    pages.close()
+    assert cache.read('key') is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_cache_evict(tmp_path):
+    cache = Cache(str(tmp_path), max_size=0)
+    list(cache.write('key', iter([[1]]), 60))
+    assert cache.entries() == []
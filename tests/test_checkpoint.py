@@ -0,0 +1,12 @@
+from avantpy.download import Checkpoint
+
+def test_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoints.db'))
+    key = checkpoint.key('https://localhost', {'index': 'iana'})
+    assert checkpoint.get(key) is None
+    checkpoint.set(key, 1668606445000)
+    assert Checkpoint(str(tmp_path / 'checkpoints.db')).get(key) == 1668606445000
+    checkpoint.set(key, 1668606446000)
+    assert checkpoint.get(key) == 1668606446000
+    checkpoint.remove(key)
+    assert checkpoint.get(key) is None
@@ -0,0 +1,52 @@
+from avantpy import Client
+import gzip
+import json
+
+class Raw:
+    def __init__(self, transferred):
+        self.transferred = transferred
+
+    def tell(self):
+        return self.transferred
+
+class Response:
+    def __init__(self, content, transferred=None, headers={}):
+        self.content = content
+        self.headers = headers
+        if transferred is not None:
+            self.raw = Raw(transferred)
+
+def client(monkeypatch, response, **kwargs):
+    client = Client('http://fake', **kwargs)
+    client.requests = []
+
+    def request(method, url, headers=None, **kwargs):
+        client.requests.append((method, url, headers, kwargs))
+        return response
+    monkeypatch.setattr(client.session, 'request', request)
+    return client
+
+def test_client_compress(monkeypatch):
+    body = json.dumps({'body': [{'n': i} for i in range(100)]})
+    c = client(monkeypatch, Response(b'{"ok": true}' * 10, 40), compress=True)
+    c.post('/api', data=body)
+    method, url, headers, kwargs = c.requests[0]
+    assert (method, url) == ('POST', 'http://fake/api')
+    assert headers['Content-Encoding'] == 'gzip' and headers['Accept-Encoding'] == 'gzip'
+    assert gzip.decompress(kwargs['data']) == body.encode()
+    assert c.sent == [len(body), len(kwargs['data'])] and len(kwargs['data']) < len(body)
+    assert c.received == [120, 40]
+    assert 'received 40 of 120 bytes (3.0x)' in c.compression()
+
+def test_client_compress_without_raw_counts_content_length(monkeypatch):
+    c = client(monkeypatch, Response(b'x' * 100, headers={'Content-Length': '25'}), compress=True)
+    c.post('/api')
+    assert 'Content-Encoding' not in c.requests[0][2] and c.sent == [0, 0]
+    assert c.received == [100, 25]
+
+def test_client_without_compress(monkeypatch):
+    c = client(monkeypatch, Response(b'{}', 2))
+    c.post('/api', data='{}')
+    method, url, headers, kwargs = c.requests[0]
+    assert 'Content-Encoding' not in headers and 'Accept-Encoding' not in headers
+    assert kwargs['data'] == '{}' and c.sent == [0, 0] and c.received == [0, 0]
@@ -0,0 +1,52 @@
+from avantpy import codec
+import json
+import pytest
+
+def test_dumps():
+    for backend in codec.backends:
+        try:
+            codec.set_backend(backend)
+        except ImportError:
+            continue
+        data = {'body': ({'id': 1, 'value': 'ação'},), 2: None}
+        assert json.loads(codec.dumps(data)) == {'body': [{'id': 1, 'value': 'ação'}], '2': None}
+    codec.set_backend()
+
+def test_dumps_big_int():
+    assert json.loads(codec.dumps({'n': 2**70})) == {'n': 2**70}
+
+def test_loads():
+    assert codec.loads(b'{"hits": {"total": 3}}') == {'hits': {'total': 3}}
+    assert codec.loads('[1, 2]') == [1, 2]
+
+def test_set_backend():
+    assert codec.set_backend('json') == 'json'
+    assert codec.set_backend() in codec.backends
+    with pytest.raises(ValueError):
+        codec.set_backend('pickle')
+
+def test_pack():
+    value = [{'id': 1, 'value': 'ação'}, 2, None]
+    assert codec.pack(value).startswith('avantpy:1:json:none:')
+    for compress in codec.compressions:
+        assert codec.unpack(codec.pack(value, compress=compress)) == value
+    with pytest.raises(ValueError):
+        codec.pack(value, format='pickle')
+
+def test_pack_msgpack():
+    pytest.importorskip('msgpack')
+    assert codec.unpack(codec.pack([1, 'a'], format='msgpack', compress='gzip')) == [1, 'a']
+
+def test_unpack_legacy():
+    assert codec.unpack("['a', 1, {'b': None}]") == ['a', 1, {'b': None}]
+    with pytest.raises(ValueError):
+        codec.unpack("__import__('os').getcwd()")
+
+def test_split():
+    text = codec.pack(list(range(100)))
+    assert codec.split('k', text, len(text)) == [('k', text)]
+    parts = codec.split('k', text, 50)
+    assert parts[-1][0] == 'k' and codec.chunks(parts[-1][1]) == len(parts) - 1
+    assert [k for k, _ in parts[:-1]] == codec.chunk_keys('k', len(parts) - 1)
+    assert codec.unpack(''.join(part for _, part in parts[:-1])) == list(range(100))
+    assert codec.chunks(text) == 0
@@ -0,0 +1,17 @@
+from avantpy.download import Columns
+import math
+
+def test_columns():
+    columns = Columns()
+    columns.extend([{'id': 'a', 'time': 1}, {'id': 'b', 'port': 80}, {'port': 'http', 'time': 2.5}])
+    data = columns.to_dict()
+    assert len(columns) == 3
+    assert data['id'] == ['a', 'b', None]
+    assert data['time'][0] == 1 and math.isnan(data['time'][1]) and data['time'][2] == 2.5
+    assert math.isnan(data['port'][0]) and data['port'][1:] == [80, 'http']
+
+def test_columns_typed():
+    columns = Columns()
+    columns.extend([{'time': 1}, {'time': 2}, {'value': 0.5}])
+    assert columns.columns['time'].typecode == 'q'
+    assert columns.columns['value'].typecode == 'd'
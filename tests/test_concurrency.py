@@ -0,0 +1,25 @@
+from avantpy.upload import Concurrency
+
+def test_concurrency_increase():
+    concurrency = Concurrency(maximum=3)
+    for _ in range(10):
+        concurrency.release(concurrency.acquire())
+    assert concurrency.limit == 3 and concurrency.peak == 3
+    assert concurrency.active == 0
+
+def test_concurrency_decrease():
+    concurrency = Concurrency(maximum=8, minimum=1)
+    concurrency.limit = 8.0
+    starts = [concurrency.acquire() for _ in range(8)]
+    assert concurrency.full()
+    for start in starts:
+        concurrency.release(start, rejected=True)
+    assert concurrency.limit == 4
+    concurrency.release(concurrency.acquire(), rejected=True)
+    assert concurrency.limit == 2
+
+def test_concurrency_latency():
+    concurrency = Concurrency(maximum=4, latency=0)
+    concurrency.limit = 4.0
+    concurrency.release(concurrency.acquire())
+    assert concurrency.limit == 2
@@ -0,0 +1,13 @@
+from avantpy.upload import HashIndex
+
+def test_hashindex(tmp_path):
+    hash_index = HashIndex(str(tmp_path / 'hashes.db'))
+    document = {'id': 1, 'index': 'iana', 'type': 'iana', 'value': 'a'}
+    key = hash_index.key('https://localhost', 'AvantData', document)
+    assert hash_index.key('https://localhost', 'AvantData', {'index': 'iana'}) is None
+    assert hash_index.get_many([key]) == {}
+    hash_index.set_many([(key, hash_index.hash(document))])
+    assert HashIndex(str(tmp_path / 'hashes.db')).get_many([key]) == {key: hash_index.hash(document)}
+    assert hash_index.hash(document) != hash_index.hash({**document, 'value': 'b'})
+    hash_index.remove([key])
+    assert hash_index.get_many([key]) == {}
@@ -0,0 +1,21 @@
+from avantpy.download import Hit
+from avantpy import codec
+import json
+
+hit = {'_id': 'a1', '_type': 'iana', '_index': 'iana', '_source': {'serviceName': 'arn', 'index': 'source'}}
+
+def test_hit():
+    view = Hit(hit)
+    assert view['id'] == 'a1'
+    assert view['index'] == 'source'
+    assert view.index == 'iana'
+    assert list(view) == ['id', 'type', 'index', 'serviceName']
+    assert len(view) == 4
+    assert view == {'id': 'a1', 'type': 'iana', 'index': 'source', 'serviceName': 'arn'}
+    assert view.get('missing') is None
+
+def test_hit_without_type():
+    assert dict(Hit({'_id': 'a1', '_index': 'iana', '_source': {}})) == {'id': 'a1', 'index': 'iana'}
+
+def test_hit_dumps():
+    assert json.loads(codec.dumps([Hit(hit)])) == [dict(Hit(hit))]
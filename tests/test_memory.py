@@ -0,0 +1,22 @@
+from avantpy.upload import Memory, AsyncMemory
+from .fake import MemoryStore, AsyncMemoryStore
+import asyncio
+
+values = {'small': 'x', 'large': [{'n': i} for i in range(50)], 'broken': 1}
+
+def test_memory_set_many_and_get_many():
+    store = MemoryStore(fail=lambda key: 500 if key == 'broken' else None)
+    assert Memory.set_many(values, client=store, chunk_size=64) == {'small': 200, 'large': 200, 'broken': 500}
+    assert store.values['large'].startswith('avantpy:1:chunks:') and 'large#1' in store.values
+    assert Memory.get_many(['small', 'large', 'broken'], client=store) == {
+        'small': ['x'], 'large': values['large'], 'broken': None}
+
+def test_asyncmemory_set_many_and_get_many():
+    store = AsyncMemoryStore(fail=lambda key: 500 if key == 'large#2' else None)
+
+    async def roundtrip():
+        statuses = await AsyncMemory.set_many(values, client=store, chunk_size=64)
+        return statuses, await AsyncMemory.get_many(['small', 'large', 'broken'], client=store)
+    statuses, stored = asyncio.run(roundtrip())
+    assert statuses == {'small': 200, 'large': 500, 'broken': 200}
+    assert stored == {'small': ['x'], 'large': None, 'broken': [1]}
@@ -0,0 +1,30 @@
+from avantpy.download import MemoryCache
+import time
+
+def test_memory_cache():
+    cache = MemoryCache(maxsize=2, ttl=60)
+    assert cache.get('https://localhost', 'a') is None
+    cache.set('https://localhost', 'a', 'avantpy:1:json:none:[1]')
+    cache.set('https://localhost', 'b', 'avantpy:1:json:none:[2]')
+    assert cache.get('https://localhost', 'a') == 'avantpy:1:json:none:[1]'
+    cache.set('https://localhost', 'c', 'avantpy:1:json:none:[3]')
+    assert cache.get('https://localhost', 'b') is None
+    assert cache.get('https://other', 'a') is None
+    cache.invalidate('https://localhost', 'a')
+    assert cache.get('https://localhost', 'a') is None
+
+def test_memory_cache_expire():
+    cache = MemoryCache()
+    cache.set('https://localhost', 'a', '[1]', ttl=0)
+    time.sleep(0.01)
+    assert cache.get('https://localhost', 'a') is None
+
+def test_memory_cache_shared(tmp_path):
+    path = str(tmp_path / 'memory.db')
+    MemoryCache(path=path).set('https://localhost', 'a', '[1]', ttl=60)
+    cache = MemoryCache(path=path)
+    assert cache.get('https://localhost', 'a') == '[1]'
+    assert len(cache.entries) == 1
+    MemoryCache(path=path).invalidate('https://localhost', 'a')
+    cache.clear()
+    assert cache.get('https://localhost', 'a') is None
@@ -0,0 +1,165 @@
+from avantpy.download import Search, Checkpoint, Cache
+from .fake import Cluster
+import pytest
+import gzip
+import json
+import csv
+
+def test_search_checkpoint_not_saved_after_failed_slice(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoints.db'))
+    fail = lambda api, payload: 503 if payload.get('body', {}).get('slice', {}).get('id') == 1 else None
+    s = Search(client=Cluster(fail=fail), size=5, slices=3, checkpoint=checkpoint, retries=0)
+    assert 0 < len(s.data) < 23 and s.failures == 1
+    assert checkpoint.get(s.checkpointKey) is None
+    s = Search(client=Cluster(), size=5, slices=3, checkpoint=checkpoint)
+    assert len(s.data) == 23 and checkpoint.get(s.checkpointKey) == 1022
+
+def test_search_resumes_lost_scroll():
+    scrolls = []
+    fail = lambda api, payload: scrolls.append(api) or (404 if api == 'scrollSearch' and len(scrolls) == 2 else None)
+    cluster = Cluster(fail=fail, scroll_size=3)
+    s = Search(client=cluster, size=5, backoff=0)
+    assert sorted(d['n'] for d in s.data) == list(range(23))
+    assert s.resumed == 1 and s.outcome['status'] == 'complete'
+    resume = cluster.requests[2][1]['body']['query']['bool']['filter'][-1]
+    assert resume == {'range': {'GenerateTime': {'lte': 1018}}}
+
+def test_search_retries_transient_errors():
+    statuses = [503, 502]
+    s = Search(client=Cluster(fail=lambda api, payload: statuses and statuses.pop(0)), size=5, backoff=0)
+    assert len(s.data) == 23 and s.retried == 2
+    assert s.outcome == {'status': 'complete', 'downloaded': 23, 'total': 23,
+                         'retried': 2, 'resumed': 0, 'failures': 0}
+
+def test_search_failed_first_request():
+    s = Search(client=Cluster(fail=lambda api, payload: 503), retries=1, backoff=0)
+    assert s.data == [] and s.retried == 1
+    assert s.outcome['status'] == 'failed' and s.outcome['failures'] == 1
+
+def test_search_lost_scroll_without_retries_is_partial():
+    fail = lambda api, payload: 404 if api == 'scrollSearch' else None
+    s = Search(client=Cluster(fail=fail), size=5, retries=0)
+    assert len(s.data) == 5 and s.outcome['status'] == 'partial'
+
+def test_search_after_pages_unique_ids():
+    s = Search(client=Cluster(), size=4, pagination='search_after')
+    assert [d['n'] for d in s.data] == list(range(22, -1, -1))
+    assert s.outcome['status'] == 'complete'
+
+def test_search_unseen():
+    s = Search(client=Cluster(), lazy=True)
+    hits = [{'_id': str(i), 'sort': [value]} for i, value in enumerate([5, 4, 4])]
+    last = s.lastSort(hits)
+    assert last == (4, {'1', '2'})
+    resumed = [{'_id': '2', 'sort': [4]}, {'_id': '3', 'sort': [4]}, {'_id': '4', 'sort': [3]}]
+    assert [hit['_id'] for hit in s.unseen(resumed, last)] == ['3', '4']
+
+def test_search_cache_only_stores_complete_downloads(tmp_path):
+    cache = Cache(str(tmp_path), ttl=60, stale=60)
+    Search(client=Cluster(fail=lambda api, payload: 503), cache=cache, retries=0)
+    lost = lambda api, payload: 404 if api == 'scrollSearch' else None
+    assert len(Search(client=Cluster(fail=lost), size=5, cache=cache, retries=0).data) == 5
+    assert cache.entries() == []
+    cluster = Cluster()
+    assert len(Search(client=cluster, size=5, cache=cache).data) == 23
+    cluster.requests.clear()
+    s = Search(client=cluster, size=5, cache=cache)
+    assert len(s.data) == 23 and s.total == 23 and cluster.requests == []
+
+def skewed():
+    cluster = Cluster()
+    for document, value in zip(cluster.documents, [*range(1000, 1020), 2000, 3000, 4000]):
+        document['_source']['GenerateTime'] = value
+    return cluster
+
+def test_search_window_ranges():
+    s = Search(client=Cluster(), windows=3, lazy=True)
+    assert s.windowRanges() == [(1016, 1023), (1008, 1016), (1000, 1008)]
+    s = Search(client=skewed(), windows=2, lazy=True)
+    assert s.windowRanges() == [(2501, 4001), (1000, 2501)]
+    s = Search(client=skewed(), windows=2, window_mode='adaptive', lazy=True)
+    assert s.windowRanges() == [(1188, 4001), (1000, 1188)]
+
+def test_search_windows():
+    s = Search(client=skewed(), size=4, windows=2, window_mode='adaptive')
+    assert [d['n'] for d in s.data] == list(range(22, -1, -1))
+    assert s.outcome['status'] == 'complete'
+
+def test_search_windows_failed_bounds():
+    fail = lambda api, payload: 503 if 'bounds' in payload['body'].get('aggs', {}) else None
+    s = Search(client=Cluster(fail=fail), windows=2, retries=0)
+    assert s.data == [] and s.outcome['status'] == 'failed'
+
+def test_search_columns_dates():
+    numpy = pytest.importorskip('numpy')
+    s = Search(client=Cluster(), sort='n', output='columns')
+    arrays = s.to_numpy()
+    assert arrays['n'].dtype == numpy.int64 and arrays['n'].max() == 22
+    assert arrays['GenerateTime'].dtype == numpy.dtype('datetime64[ms]')
+    assert Search(client=Cluster(), sort='n', output='columns', dates=[]).to_numpy()['GenerateTime'].dtype == numpy.int64
+
+def test_search_export_ndjson_gzip(tmp_path):
+    s = Search(client=Cluster(), size=5, lazy=True)
+    result = s.export(str(tmp_path / 'fake.ndjson.gz'), compress='gzip')
+    with gzip.open(str(tmp_path / 'fake.ndjson.gz'), 'rt') as f:
+        documents = [json.loads(line) for line in f]
+    assert result['documents'] == 23 and len(documents) == 23
+    assert documents[0] == {'id': '22', 'type': 'doc', 'index': 'fake', 'GenerateTime': 1022, 'n': 22}
+
+def test_search_export_csv_fields(tmp_path, caplog):
+    cluster = Cluster()
+    cluster.documents[0]['_source']['late'] = 'x'
+    s = Search(client=cluster, size=5, lazy=True)
+    s.export(str(tmp_path / 'fake.csv'), format='csv')
+    assert "dropped: ['late']" in caplog.text
+    s.export(str(tmp_path / 'fake.csv'), format='csv', fieldnames=['id', 'n', 'late'])
+    with open(str(tmp_path / 'fake.csv')) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 23 and rows[-1] == {'id': '0', 'n': '0', 'late': 'x'}
+
+def test_search_batch_arguments_and_payloads():
+    cluster = Cluster()
+    payload = lambda **kwargs: Search(client=cluster, index='fake', lazy=True, **kwargs).makeQuery()
+    searches = Search.batch([{'index': 'fake', 'size': 5},
+                             payload(size=5),
+                             payload(size=5, pagination='search_after'),
+                             payload(aggs={'bounds': {'stats': {'field': 'GenerateTime'}}})], client=cluster)
+    assert [len({d['id'] for d in s.data}) for s in searches[:3]] == [23, 23, 23]
+    assert [s.outcome['status'] for s in searches[:3]] == ['complete'] * 3
+    assert searches[3].data == [{'bounds': {'count': 23, 'min': 1000, 'max': 1022}}]
+
+def test_search_pools_a_connection_per_window():
+    assert Search('http://fake', windows=16, lazy=True).client.pool_maxsize == 16
+    assert Search('http://fake', slices=12, lazy=True).client.pool_maxsize == 12
+
+def test_search_composite_pages():
+    cluster = Cluster()
+    aggs = {'buckets': {'composite': {'size': 2, 'sources': [{'bucket': {'histogram': {'field': 'n', 'interval': 5}}}]},
+                        'aggs': {'last': {'max': {'field': 'GenerateTime'}},
+                                 'times': {'stats': {'field': 'GenerateTime'}}}}}
+    s = Search(client=cluster, aggs=aggs, flatten=True)
+    afters = [payload['body']['aggs']['buckets']['composite'].get('after') for _, payload in cluster.requests]
+    assert afters == [None, {'bucket': 5}, {'bucket': 15}]
+    assert [row['bucket'] for row in s.data] == [0, 5, 10, 15, 20]
+    assert s.data[-1] == {'bucket': 20, 'doc_count': 3, 'last': 1022,
+                          'times.count': 3, 'times.min': 1020, 'times.max': 1022}
+    assert s.outcome == {'status': 'complete', 'downloaded': 5, 'total': 23,
+                         'retried': 0, 'resumed': 0, 'failures': 0}
+    columns = Search(client=Cluster(), aggs=aggs, output='columns').data.to_numpy()
+    assert list(columns['doc_count']) == [5, 5, 5, 5, 3] and list(columns['last']) == [1004, 1009, 1014, 1019, 1022]
+
+def test_search_count_and_histogram():
+    cluster = Cluster()
+    s = Search(client=cluster, mode='count')
+    assert s.total == 23 and s.data == []
+    (api, payload), = cluster.requests
+    assert api == 'customSearch' and payload['body']['size'] == 0
+    assert 'scroll' not in payload and 'sort' not in payload['body']
+    s = Search(client=cluster, lazy=True)
+    assert s.count() == 23
+    assert s.histogram() == {'fake': 23}
+    assert s.histogram('10ms') == {'1970-01-01T00:00:01.000Z': 10,
+                                   '1970-01-01T00:00:01.010Z': 10,
+                                   '1970-01-01T00:00:01.020Z': 3}
+    assert cluster.requests[-1][1]['body']['aggs'] == {'histogram': {'date_histogram': {
+        'field': 'GenerateTime', 'interval': '10ms', 'min_doc_count': 1}}}
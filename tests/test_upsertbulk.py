@@ -0,0 +1,115 @@
+from avantpy.upload import UpsertBulk, AsyncUpsertBulk, HashIndex
+import threading
+import asyncio
+import time
+import sys
+import json
+
+class Response:
+    def __init__(self, content, status_code=200):
+        self.content = json.dumps(content).encode()
+        self.text = self.content.decode()
+        self.status_code = status_code
+
+class Client:
+    url, cluster, verify_SSL, compress = 'http://x', 'default', True, False
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.chunks = []
+        self.bodies = []
+
+    def put(self, url, data=None):
+        self.chunks.append([document['id'] for document in json.loads(data)['body']])
+        self.bodies.append(len(data))
+        if not self.responses:
+            return Response({'errors': False, 'items': [item('created') for _ in self.chunks[-1]]})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+class AsyncClient(Client):
+    async def put(self, url, data=None):
+        response = Client.put(self, url, data=data)
+        return response.status_code, response.content
+
+def item(result=None, error=None, status=200):
+    if error:
+        return {'update': {'status': status, 'error': {'type': error, 'reason': error}}}
+    return {'update': {'status': status, 'result': result}}
+
+def test_upsertbulk_retries_failed_documents():
+    client = Client(Response({'errors': True, 'items': [item('created'),
+                                                        item(error='es_rejected_execution_exception', status=429),
+                                                        item(error='mapper_parsing_exception', status=400)]}),
+                    Response({'errors': False, 'items': [item('updated')]}))
+    upsert = UpsertBulk([{'id': i} for i in range(3)], client=client, backoff=0)
+    result = upsert.upload()
+    assert client.chunks == [[0, 1, 2], [1]]
+    assert result['created'] == 1 and result['updated'] == 1 and result['retried'] == 1
+    assert result['failed'] == 1 and result['failed_ids'] == [2]
+    assert result['errors'] == {'mapper_parsing_exception': 1}
+
+def test_upsertbulk_gives_up_after_retries():
+    client = Client(ConnectionError('reset'), Response({}, 503))
+    upsert = UpsertBulk([{'id': i} for i in range(2)], client=client, retries=1, backoff=0)
+    result = upsert.upload()
+    assert client.chunks == [[0, 1], [0, 1]]
+    assert result['failed_ids'] == [0, 1] and result['retried'] == 2
+    assert result['errors'] == {'Status code 503': 2}
+
+def test_upsertbulk_skips_unchanged_documents(tmp_path):
+    hash_index = HashIndex(str(tmp_path / 'hashes.db'))
+    client = Client(Response({'errors': True, 'items': [item('created'), item('created'),
+                                                        item(error='mapper_parsing_exception', status=400)]}),
+                    Response({'errors': False, 'items': [item('updated'), item('created')]}))
+    documents = [{'id': i, 'index': 'iana', 'value': i} for i in range(3)]
+    UpsertBulk(documents, client=client, hash_index=hash_index).upload()
+    documents[1]['value'] = 10
+    result = UpsertBulk(documents, client=client, hash_index=hash_index).upload()
+    assert client.chunks == [[0, 1, 2], [1, 2]]
+    assert result['total'] == 3 and result['skipped'] == 1
+
+def test_asyncupsertbulk_retries_failed_documents(monkeypatch):
+    monkeypatch.setattr(sys.modules['avantpy.upload.UpsertBulk'], 'Client', None)
+    client = AsyncClient(Response({'errors': True, 'items': [item('created'),
+                                                             item(error='es_rejected_execution_exception', status=429)]}),
+                         Response({'errors': False, 'items': [item('created')]}))
+    result = asyncio.run(AsyncUpsertBulk([{'id': i} for i in range(2)], client=client, backoff=0).upload())
+    assert client.chunks == [[0, 1], [1]]
+    assert result['created'] == 2 and result['failed'] == 0 and result['retried'] == 1
+
+def test_upsertbulk_max_bytes():
+    documents = [{'id': i, 'v': 'x' * (60 if 5 <= i < 9 else 1)} for i in range(12)]
+    documents.insert(3, {'id': 'big', 'v': 'x' * 500})
+    client = Client()
+    result = UpsertBulk(documents, client=client, chunk_size=3, max_bytes=200).upload()
+    assert max(client.bodies) <= 200
+    assert client.chunks == [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9, 10], [11]]
+    assert result['oversized'] == ['big'] and result['created'] == 12 and result['total'] == 13
+
+def test_upsertbulk_reads_generators_lazily():
+    state = {'read': 0, 'done': 0, 'ahead': 0, 'first': None}
+    lock = threading.Lock()
+
+    def documents():
+        for i in range(40):
+            with lock:
+                state['read'] += 1
+                state['ahead'] = max(state['ahead'], state['read'] - state['done'])
+            yield {'id': i}
+
+    class Slow(Client):
+        def put(self, url, data=None):
+            if state['first'] is None:
+                state['first'] = state['read']
+            time.sleep(0.005)
+            response = Client.put(self, url, data=data)
+            with lock:
+                state['done'] += 2
+            return response
+    result = UpsertBulk(documents(), client=Slow(), chunk_size=2, threads=2).upload()
+    assert result['created'] == 40 and result['total'] == 40
+    assert state['first'] < 40
+    assert state['ahead'] <= (2 * 2 + 1) * 2
@@ -4,6 +4,19 @@ def test_generateID():
     assert utils.generateID(
         'Generate ID with MD5 hash text') == '3b3331b428cc68278b975d0d177b9948'
 
+def test_canonical_hash():
+    assert utils.canonical_hash({'a': 1, 'b': [1, 2]}) == utils.canonical_hash({'b': [1, 2], 'a': 1})
+    assert utils.canonical_hash({'a': 1}) != utils.canonical_hash({'a': 2})
+    assert len(utils.canonical_hash('url', {'index': 'iana'})) == 64
+
+def test_retryable():
+    assert utils.retryable(503) and utils.retryable(429)
+    assert not utils.retryable(404) and not utils.retryable(None)
+
+def test_backoff():
+    assert 0.5 <= utils.backoff(1, base=0.5) <= 1
+    assert 15 <= utils.backoff(10, base=0.5, cap=30) <= 30
+
 def test_edit():
     data = [{'name': 'John', 'age': 30}, {'name': 'Jane', 'age': 25}]
     keys = {'name': 'firstName'}